@@ -0,0 +1,162 @@
+import argparse
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import geopandas as gpd
+import pandas as pd
+import shapely
+from shapely.strtree import STRtree
+from dotenv import load_dotenv
+
+import scrapper
+from scrapper import (DEFAULT_MAX_WORKERS, SEARCH_TYPES, BrickIndex, build_search_plan, collect_places,
+                      create_session, load_region_layer, submit_search)
+from places_cache import cache_from_env
+from metrics import flush_all
+from rate_control import AIMDController, PlacesFetchError, RateLimiter
+
+# Load environment variables
+load_dotenv()
+
+def _init_worker(lock, next_slot, rate):
+    if rate:
+        # One limiter state shared by every worker process keeps them together under `rate` requests per second
+        scrapper.rate_limiter = RateLimiter(rate, lock, next_slot)
+
+def count_calls(schedule):
+    return sum(len(searches) for _, _, searches in schedule)
+
+def scrape_partition(api_key, region_name, units, layer, max_workers, log_file, use_cache):
+    """Fetch one region's share of the joint plan in a worker process and return its place records.
+
+    Places are kept anywhere in the combined regions, so a border search owned by one region still
+    records what it finds across the border.
+    """
+    polygon = layer.geometry.union_all()
+    shapely.prepare(polygon)
+    brick_index = BrickIndex(layer)
+    region_index = BrickIndex(layer, name_column='Region')
+    cache = cache_from_env() if use_cache else None
+
+    all_places = []
+    processed_ids = set()
+    failed = 0
+    scrapper.rate_controller = AIMDController(initial=max(1, max_workers // 2), maximum=max_workers)
+    with create_session(max_workers) as session, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [submit_search(executor, None, grid_index, search_index, api_key, point, radius, place_type,
+                                 f"{region_name}:{grid_index}", search_index, log_file, session, cache)
+                   for grid_index, point, search_index, place_type, radius in units]
+        for (grid_index, point, search_index, place_type, radius), future in zip(units, futures):
+            try:
+                places = future.result()
+                collect_places(places, place_type, polygon, brick_index, processed_ids, all_places)
+            except PlacesFetchError as e:
+                print(f"{region_name}: search failed at {point}: {e}")
+                failed += 1
+            except Exception as e:
+                # e.g. a locked shared cache file or a malformed response: lose this search, not the region
+                print(f"{region_name}: search failed at {point}: {type(e).__name__}: {e}")
+                failed += 1
+
+    if all_places:
+        regions = region_index.lookup([place['Longitude'] for place in all_places],
+                                      [place['Latitude'] for place in all_places])
+        for place, region in zip(all_places, regions):
+            place['Region'] = region
+
+    flush_all()
+    if cache is not None:
+        cache.close()
+    print(f"{region_name}: {len(units)} API calls, {len(all_places)} places"
+          + (f", {failed} searches failed" if failed else ""))
+    return all_places
+
+def batch_scrape(api_key, region_paths, output_file, processes=None, max_workers=DEFAULT_MAX_WORKERS, rate=None,
+                 planner='square', log_file='api_calls.log', use_cache=True):
+    """Scrape many regions (shapefiles or KMLs) as one job and write a single deduplicated CSV.
+
+    The regions are planned together on their union, so search points along shared borders are planned
+    once instead of once per side. Each search point is fetched by the region it lies in (or the nearest
+    one), regions run in parallel worker processes, and `rate` caps requests per second across all of them.
+    A region whose worker fails outright is reported and left out; the other regions are still written.
+    """
+    layers = []
+    region_names = []
+    for path in region_paths:
+        name = os.path.splitext(os.path.basename(path))[0]
+        if name in region_names:
+            # e.g. defenceBricks.shp and defenceBricks.kml side by side
+            name = os.path.basename(path)
+        gdf = load_region_layer(path).assign(Region=name)
+        layers.append(gdf[[column for column in ('name', 'Region', 'geometry') if column in gdf.columns]])
+        region_names.append(name)
+    layer = gpd.GeoDataFrame(pd.concat(layers, ignore_index=True), crs="EPSG:4326")
+    region_polygons = [region.geometry.union_all() for region in layers]
+    union = shapely.union_all(region_polygons)
+    print(f"Loaded {len(region_names)} regions with {len(layer)} bricks.")
+
+    # Planning each region alone pays twice for the strips that neighbours share
+    separate_calls = sum(count_calls(build_search_plan(polygon, SEARCH_TYPES, planner, verbose=False))
+                         for polygon in region_polygons)
+    schedule = build_search_plan(union, SEARCH_TYPES, planner)
+    joint_calls = count_calls(schedule)
+    print(f"Joint plan: {joint_calls} API calls instead of {separate_calls} planned region by region "
+          f"({separate_calls - joint_calls} cross-region duplicates dropped)")
+
+    # Each search point belongs to the region containing it, or the nearest one for points just outside
+    owners = STRtree(region_polygons).nearest(
+        shapely.points([point[1] for _, point, _ in schedule], [point[0] for _, point, _ in schedule]))
+    partitions = {name: [] for name in region_names}
+    for (grid_index, point, searches), owner in zip(schedule, owners.tolist()):
+        for search_index, place_type, radius in searches:
+            partitions[region_names[owner]].append((grid_index, point, search_index, place_type, radius))
+
+    ctx = multiprocessing.get_context()
+    lock = ctx.Lock()
+    next_slot = ctx.Value('d', 0.0, lock=False)
+    with ProcessPoolExecutor(max_workers=processes, mp_context=ctx, initializer=_init_worker,
+                             initargs=(lock, next_slot, rate)) as pool:
+        futures = {name: pool.submit(scrape_partition, api_key, name, units, layer, max_workers, log_file, use_cache)
+                   for name, units in partitions.items() if units}
+        results = []
+        failed_regions = []
+        for name, future in futures.items():
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"{name}: region failed, its places are missing from the output: {type(e).__name__}: {e}")
+                failed_regions.append(name)
+
+    # Places seen by several workers are kept once, first region in input order wins
+    all_places = []
+    processed_ids = set()
+    for places in results:
+        for place in places:
+            if place['Place ID'] not in processed_ids:
+                processed_ids.add(place['Place ID'])
+                all_places.append(place)
+
+    print(f"\nTotal API calls made: {joint_calls}")
+    print(f"Total unique places found: {len(all_places)}")
+
+    df = pd.DataFrame(all_places)
+    df.to_csv(output_file, index=False, encoding='utf-8')
+    print(f"Data saved to {output_file}")
+    if failed_regions:
+        print(f"Failed regions, rerun them: {', '.join(failed_regions)}")
+
+# Usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape several regions as one deduplicated batch.")
+    parser.add_argument("output_file")
+    parser.add_argument("regions", nargs="+", help="region shapefiles or KML files")
+    parser.add_argument("--processes", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS, help="concurrent requests per process")
+    parser.add_argument("--rate", type=float, help="global API requests per second across all processes")
+    parser.add_argument("--planner", choices=["square", "hex"], default="square")
+    args = parser.parse_args()
+
+    api_key = os.getenv("GOOGLE_PLACES_API_KEY")
+    batch_scrape(api_key, args.regions, args.output_file, processes=args.processes, max_workers=args.workers,
+                 rate=args.rate, planner=args.planner)
@@ -0,0 +1,163 @@
+import argparse
+import contextlib
+import glob
+import io
+import os
+import tempfile
+import time
+
+import geopandas as gpd
+import pandas as pd
+
+import scrapper
+from metrics import events_for, stages
+from mock_places_server import MockPlacesServer, recorded_businesses, synthetic_businesses
+from scrapper import load_region_layer, scrape_medical_businesses
+
+def sample_regions(patterns=('lahoreShp/**/*.shp', 'karachiShp/**/*.shp')):
+    """Region shapefiles shipped with the repo that hold polygons (point layers such as karchigrids are skipped)."""
+    regions = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern, recursive=True)):
+            try:
+                load_region_layer(path)
+            except ValueError:
+                continue
+            regions.append(path)
+    return regions
+
+def region_area_km2(gdf):
+    """Ground area of a region layer in square kilometres, measured in its local UTM zone."""
+    region = gpd.GeoSeries([gdf.geometry.union_all()], crs="EPSG:4326")
+    return region.to_crs(region.estimate_utm_crs()).area.iloc[0] / 1e6
+
+def benchmark_region(path, businesses_per_km2=10, recorded=None, latency_ms=50, error_rate=0.0, qps_limit=None,
+                     burst_every=None, max_workers=8, planner='square', adaptive=False, simplify_tolerance=None, seed=0):
+    """Scrape one region against a local MockPlacesServer and return its timings and yield.
+
+    Businesses are synthetic (businesses_per_km2 over the region's bounds) unless recorded outputs are
+    given. The response cache is bypassed so every search is a request.
+    """
+    gdf = load_region_layer(path)
+    area = region_area_km2(gdf)
+    if recorded:
+        businesses = recorded_businesses(recorded)
+    else:
+        businesses = synthetic_businesses(gdf.total_bounds, max(int(area * businesses_per_km2), 1), seed=seed)
+
+    with tempfile.TemporaryDirectory() as work_dir, \
+            MockPlacesServer(businesses, latency_ms=latency_ms, error_rate=error_rate, qps_limit=qps_limit,
+                             burst_every=burst_every, seed=seed) as server:
+        previous_url = os.environ.get('PLACES_API_URL')
+        os.environ['PLACES_API_URL'] = server.url
+        log_file = os.path.join(work_dir, 'api_calls.log')
+        start = time.perf_counter()
+        try:
+            # The scrape's own progress output would drown the report
+            with contextlib.redirect_stdout(io.StringIO()):
+                scrape_medical_businesses('mock-key', path, os.path.join(work_dir, 'out.csv'), log_file=log_file,
+                                          max_workers=max_workers, adaptive=adaptive, cache=None, planner=planner,
+                                          coverage_map='off', simplify_tolerance=simplify_tolerance)
+        finally:
+            if previous_url is None:
+                os.environ.pop('PLACES_API_URL', None)
+            else:
+                os.environ['PLACES_API_URL'] = previous_url
+        elapsed = time.perf_counter() - start
+        places = len(pd.read_csv(os.path.join(work_dir, 'out.csv')))
+
+    summary = events_for(log_file).summary(stages.totals.get('fetching'))
+    return {
+        'region': path,
+        'area_km2': round(area, 1),
+        'businesses': len(businesses),
+        # Grid validation is timed as its own stage inside planning
+        'rejected': server.rejected,
+        'planning_s': round(stages.totals.get('planning', 0.0) + stages.totals.get('coverage validation', 0.0), 3),
+        'calls': summary['calls'],
+        'calls_per_sec': summary['calls_per_sec'],
+        'results_per_call': summary['results_per_call'],
+        'saturation_rate': summary['saturation_rate'],
+        'places': places,
+        'total_s': round(elapsed, 2),
+        's_per_km2': round(elapsed / area, 4) if area else None,
+    }
+
+def check_unchanged_refresh(path, snapshot_file, max_workers=8, planner='square', audit_seed=0):
+    """Refresh a snapshot against a mock API serving exactly that snapshot; returns the problems found.
+
+    Nothing changed, so the diff must be empty and the sentinels over empty cells must restore no
+    searches. An empty list means the check passed.
+    """
+    import refresh
+    businesses = recorded_businesses(snapshot_file)
+    with tempfile.TemporaryDirectory() as work_dir, MockPlacesServer(businesses, latency_ms=0) as server:
+        previous_url = os.environ.get('PLACES_API_URL')
+        os.environ['PLACES_API_URL'] = server.url
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                diff = refresh.refresh_region('mock-key', path, snapshot_file,
+                                              output_file=os.path.join(work_dir, 'refreshed.csv'),
+                                              diff_file=os.path.join(work_dir, 'diff.csv'),
+                                              log_file=os.path.join(work_dir, 'api_calls.log'),
+                                              max_workers=max_workers, planner=planner, audit_seed=audit_seed)
+        finally:
+            if previous_url is None:
+                os.environ.pop('PLACES_API_URL', None)
+            else:
+                os.environ['PLACES_API_URL'] = previous_url
+
+    problems = []
+    if len(diff):
+        problems.append(f"{len(diff)} places reported as changed: {', '.join(sorted(set(diff['Change'])))}")
+    if diff.attrs['restored']:
+        problems.append(f"{diff.attrs['restored']} searches restored by {diff.attrs['sentinels']} sentinels")
+    return problems
+
+def run_benchmarks(regions=None, output_file=None, **options):
+    """Benchmark every region (default: all sample regions) and print one row per region."""
+    rows = []
+    for path in regions or sample_regions():
+        row = benchmark_region(path, **options)
+        rows.append(row)
+        print(f"{row['region']}: {row['area_km2']} km2, planning {row['planning_s']}s, {row['calls']} calls at "
+              f"{row['calls_per_sec']}/s, {row['results_per_call']} results/call, {row['total_s']}s total "
+              f"({row['s_per_km2']} s/km2)")
+    report = pd.DataFrame(rows)
+    if output_file:
+        report.to_csv(output_file, index=False)
+        print(f"Benchmark saved to {output_file}")
+    return report
+
+# Usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark scrapes of the sample regions against a local mock API.")
+    parser.add_argument("regions", nargs="*", help="region files (default: every sample region)")
+    parser.add_argument("--output", help="write the report to this CSV")
+    parser.add_argument("--recorded", nargs="+", help="serve businesses from earlier outputs instead of synthetic ones")
+    parser.add_argument("--density", type=float, default=10, help="synthetic businesses per km2")
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--qps-limit", type=float, help="answer OVER_QUERY_LIMIT above this rate")
+    parser.add_argument("--burst-every", type=float, help="seconds between 1s OVER_QUERY_LIMIT bursts")
+    parser.add_argument("--workers", type=int, default=scrapper.DEFAULT_MAX_WORKERS)
+    parser.add_argument("--planner", choices=["square", "hex"], default="square")
+    parser.add_argument("--adaptive", action="store_true")
+    parser.add_argument("--simplify", type=float, metavar="METRES", help="scrape simplified region outlines")
+    parser.add_argument("--refresh-check", metavar="SNAPSHOT",
+                        help="instead of benchmarking, check that refreshing an unchanged SNAPSHOT of the region "
+                             "finds no changes and restores no searches")
+    args = parser.parse_args()
+
+    if args.refresh_check:
+        failed = False
+        for path in args.regions or sample_regions():
+            problems = check_unchanged_refresh(path, args.refresh_check, max_workers=args.workers, planner=args.planner)
+            print(f"{path}: " + ("; ".join(problems) if problems else "unchanged refresh OK"))
+            failed = failed or bool(problems)
+        raise SystemExit(1 if failed else 0)
+
+    run_benchmarks(args.regions, args.output, businesses_per_km2=args.density, recorded=args.recorded,
+                   latency_ms=args.latency_ms, error_rate=args.error_rate, qps_limit=args.qps_limit,
+                   burst_every=args.burst_every, max_workers=args.workers,
+                   planner=args.planner, adaptive=args.adaptive, simplify_tolerance=args.simplify)
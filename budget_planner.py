@@ -0,0 +1,105 @@
+import heapq
+
+import numpy as np
+import pandas as pd
+from shapely.strtree import STRtree
+
+from merge_engine import read_normalised
+from region_geometry import local_projector, within_distance
+
+def load_density(paths):
+    """Known business locations from earlier outputs (Karachi.csv, Lahore.csv, ...) as Latitude/Longitude/Type.
+
+    Rows without coordinates are dropped; files without a Type column count towards every type.
+    """
+    frames = []
+    for path in [paths] if isinstance(paths, str) else paths:
+        df = read_normalised(path)
+        frame = pd.DataFrame({
+            'Latitude': pd.to_numeric(df.get('Latitude'), errors='coerce'),
+            'Longitude': pd.to_numeric(df.get('Longitude'), errors='coerce'),
+            'Type': df['Type'] if 'Type' in df.columns else '',
+        })
+        if 'Place ID' in df.columns:
+            frame['Place ID'] = df['Place ID']
+        frames.append(frame.dropna(subset=['Latitude', 'Longitude']))
+    if not frames:
+        return pd.DataFrame({'Latitude': [], 'Longitude': [], 'Type': []})
+    density = pd.concat(frames, ignore_index=True)
+    if 'Place ID' in density.columns:
+        # A business seen in several outputs is still one business
+        density = density[density['Place ID'].isna() | (density['Place ID'] == '') | ~density['Place ID'].duplicated()]
+    return density.reset_index(drop=True)
+
+def plan_within_budget(schedule, budget, density, prior=0.1, cap=20, verbose=True):
+    """Pick at most `budget` searches from a build_search_plan schedule, greedily maximising expected new results.
+
+    Known businesses from `density` (see load_density) each carry weight 1 and every candidate search
+    point adds `prior` for businesses nobody has seen yet. A search is expected to return the weight
+    inside its circle, capped at `cap` results per query. Once picked, the weight it is expected to
+    claim is removed from every sample it covers, so overlapping circles only count what they add.
+    Gains can only shrink, so stale heap entries are re-scored lazily instead of all on every pick.
+
+    Returns (schedule, expected_results) with grid points ordered by when they were first picked.
+    """
+    units = [(grid_index, point, search_index, place_type, radius)
+             for grid_index, point, searches in schedule
+             for search_index, place_type, radius in searches]
+    if not units:
+        return [], 0.0
+
+    project = local_projector(np.mean([point[0] for _, point, _, _, _ in units]))
+
+    types = density['Type'].astype(str)
+    # covered[u] indexes into weights[type of u]
+    weights = {}
+    covered = [None] * len(units)
+    for place_type in dict.fromkeys(unit[3] for unit in units):
+        typed = density[(types == place_type) | (types == '')]
+        members = [u for u, unit in enumerate(units) if unit[3] == place_type]
+        unit_lats = [units[u][1][0] for u in members]
+        unit_lngs = [units[u][1][1] for u in members]
+        samples = project(np.concatenate([typed['Latitude'].to_numpy(), unit_lats]),
+                          np.concatenate([typed['Longitude'].to_numpy(), unit_lngs]))
+        weights[place_type] = np.concatenate([np.ones(len(typed)), np.full(len(members), prior)])
+        tree = STRtree(samples)
+        centres = project(unit_lats, unit_lngs)
+        for radius in dict.fromkeys(units[u][4] for u in members):
+            batch = [i for i, u in enumerate(members) if units[u][4] == radius]
+            for i, hits in zip(batch, within_distance(tree, centres[batch], radius)):
+                covered[members[i]] = hits
+
+    def score(u):
+        # Expected results, then the uncapped weight so denser circles win ties between saturated ones
+        total = weights[units[u][3]][covered[u]].sum()
+        return min(cap, total), total
+
+    # Heap order breaks remaining ties by plan order
+    heap = [(-gain, -total, u) for u in range(len(units)) for gain, total in [score(u)]]
+    heapq.heapify(heap)
+    picked = []
+    expected = 0.0
+    while heap and len(picked) < budget:
+        _, _, u = heapq.heappop(heap)
+        gain, total = score(u)
+        if heap and (-gain, -total) > heap[0][:2]:
+            # Stale score: searches picked since it was pushed took some of its weight
+            heapq.heappush(heap, (-gain, -total, u))
+            continue
+        if gain <= 0:
+            break
+        picked.append(u)
+        expected += gain
+        # Every covered sample gives up the same share of its weight
+        weights[units[u][3]][covered[u]] *= 1 - gain / total
+
+    plan = {}
+    for u in picked:
+        grid_index, point, search_index, place_type, radius = units[u]
+        plan.setdefault((grid_index, point), []).append((search_index, place_type, radius))
+    budgeted = [(grid_index, point, sorted(searches)) for (grid_index, point), searches in plan.items()]
+
+    if verbose:
+        print(f"Budget plan: {len(picked)} of {len(units)} planned searches within a budget of {budget}, "
+              f"expecting about {expected:.0f} results")
+    return budgeted, expected
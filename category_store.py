@@ -0,0 +1,89 @@
+import os
+import shutil
+
+import pandas as pd
+
+from keyword_classifier import MERGE_GROUPS, KeywordClassifier
+from merge_engine import normalise_columns
+
+# Partition columns, outermost first: city=<city>/group=<keyword group>/keyword=<search keyword>/
+PARTITION_COLUMNS = ['city', 'group', 'keyword']
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+    except ImportError as e:
+        raise ImportError("The category store needs pyarrow: pip install pyarrow") from e
+    return pa, ds
+
+def _partitioning():
+    pa, ds = _pyarrow()
+    return ds.partitioning(pa.schema([(column, pa.string()) for column in PARTITION_COLUMNS]), flavor='hive')
+
+def search_keyword(value, city):
+    """'Pharmacy, Islamabad' -> 'Pharmacy'; the city already has its own partition."""
+    suffix = f", {city}"
+    return value[:-len(suffix)] if isinstance(value, str) and value.endswith(suffix) else value
+
+def write_categorized(df, root, city, keyword_column='SearchKeyword', groups=MERGE_GROUPS):
+    """Store one city's scraped rows as a Parquet dataset partitioned by city, keyword group and keyword.
+
+    groups maps each group partition to its keywords (see KeywordClassifier); the default is the
+    medical store / clinic / hospital split that pys/filterMerge.py merges. Column names are normalised
+    to the scrapper schema and Latitude/Longitude are stored as floats; everything else stays text, as
+    in the CSVs. The city's existing partition is replaced.
+    Returns the number of rows written.
+    """
+    pa, ds = _pyarrow()
+    df = normalise_columns(df).copy()
+    for column in ('Latitude', 'Longitude'):
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors='coerce')
+    for column in df.columns:
+        if column not in ('Latitude', 'Longitude'):
+            df[column] = df[column].astype(str).where(df[column].notna(), None)
+
+    df['city'] = city
+    df['group'] = KeywordClassifier(groups).classify_series(df[keyword_column])
+    df['keyword'] = df[keyword_column].map(lambda value: search_keyword(value, city)).fillna('unknown')
+
+    # Same directory name pyarrow writes, which percent-encodes spaces and punctuation ('new%20karachi')
+    city_dir = os.path.join(root, _partitioning().format(ds.field('city') == city)[0])
+    if os.path.isdir(city_dir):
+        shutil.rmtree(city_dir)
+    ds.write_dataset(pa.Table.from_pandas(df, preserve_index=False), root, format='parquet',
+                     partitioning=_partitioning(), basename_template='part-{i}.parquet',
+                     existing_data_behavior='overwrite_or_ignore')
+    return len(df)
+
+def query(root, city=None, group=None, keyword=None, columns=None, where=None):
+    """Read rows from the category store as a DataFrame.
+
+    city, group and keyword each take one value or a list; they select partitions, so only the
+    matching directories are opened. columns limits which columns are read, and where is an extra
+    pyarrow.dataset expression (e.g. ds.field('Status') == 'OPERATIONAL') pushed down to the scan.
+
+    Example: query('categorized.parquet', city='Islamabad', group='medical_store',
+                   columns=['Place ID', 'Business Name', 'Latitude', 'Longitude'])
+    """
+    _, ds = _pyarrow()
+    dataset = ds.dataset(root, format='parquet', partitioning=_partitioning())
+    expression = where
+    for column, value in (('city', city), ('group', group), ('keyword', keyword)):
+        if value is None:
+            continue
+        condition = ds.field(column).isin(value) if isinstance(value, (list, tuple, set)) \
+            else ds.field(column) == value
+        expression = condition if expression is None else expression & condition
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+def partitions(root):
+    """(city, group, keyword) of every partition in the store, for seeing what can be queried."""
+    _, ds = _pyarrow()
+    dataset = ds.dataset(root, format='parquet', partitioning=_partitioning())
+    found = set()
+    for fragment in dataset.get_fragments():
+        keys = ds.get_partition_keys(fragment.partition_expression)
+        found.add(tuple(keys.get(column) for column in PARTITION_COLUMNS))
+    return sorted(found)
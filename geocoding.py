@@ -0,0 +1,123 @@
+import json
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from places_cache import PlacesCache
+from rate_control import RateLimiter
+
+def normalise_address(address):
+    """Case- and punctuation-insensitive form of an address, used to spot repeats before geocoding."""
+    if not isinstance(address, str):
+        return ''
+    return ' '.join(re.sub(r'[^\w]+', ' ', address.lower()).split())
+
+class NominatimProvider:
+    """Geocodes through one shared geopy Nominatim client.
+
+    The public server allows one request per second, which is the default rate. Point domain/scheme at
+    a self-hosted or local stand-in Nominatim to test or to run faster.
+    """
+
+    name = 'nominatim'
+
+    def __init__(self, user_agent="my_geocoder", domain=None, scheme=None, rate=1.0, timeout=10):
+        from geopy.geocoders import Nominatim
+        options = {'user_agent': user_agent, 'timeout': timeout}
+        if domain:
+            options['domain'] = domain
+        if scheme:
+            options['scheme'] = scheme
+        self.geolocator = Nominatim(**options)
+        self.rate = rate
+
+    def geocode(self, address):
+        """Return (latitude, longitude) or None when the address is not found."""
+        location = self.geolocator.geocode(address)
+        return (location.latitude, location.longitude) if location else None
+
+class Geocoder:
+    """Geocodes many addresses: dedupe, then cache, then rate-limited concurrent provider calls.
+
+    Identical addresses (after normalise_address) are geocoded once, answers are kept in a persistent
+    PlacesCache (not-found answers too, so they are not retried on every run), and cache misses go to
+    the provider from max_workers threads, together never faster than the provider's rate.
+
+    Args:
+        provider: Object with geocode(address) -> (lat, lon) or None, a `name` and a `rate` (requests/sec).
+        cache (PlacesCache): Persistent cache; None disables caching.
+        max_workers (int): Concurrent provider calls.
+    """
+
+    def __init__(self, provider, cache=None, max_workers=4):
+        self.provider = provider
+        self.cache = cache
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(getattr(provider, 'rate', None))
+        self.provider_calls = 0
+        self.errors = 0
+        self._counter_lock = threading.Lock()
+
+    def _key(self, normalised):
+        return json.dumps(['geocode', self.provider.name, normalised])
+
+    def _lookup(self, address, normalised):
+        self.rate_limiter.acquire()
+        try:
+            coordinates = self.provider.geocode(address)
+        except Exception as e:
+            # Failed lookups are not cached, so they are retried on the next run
+            print(f"Error geocoding '{address}': {e}")
+            with self._counter_lock:
+                self.errors += 1
+            return None
+        with self._counter_lock:
+            self.provider_calls += 1
+        if self.cache is not None:
+            self.cache.put(self._key(normalised), {'location': list(coordinates) if coordinates else None})
+        return coordinates
+
+    def geocode_series(self, addresses):
+        """Return a DataFrame with Latitude and Longitude for every address, aligned to its index.
+
+        provider_calls and errors keep running totals over the Geocoder's life; the summary printed
+        here counts this call only.
+        """
+        normalised = addresses.map(normalise_address)
+        codes, uniques = pd.factorize(normalised)
+        # First original spelling of each distinct address is the one sent to the provider
+        first_positions = pd.Series(np.arange(len(codes))).groupby(codes).first()
+        originals = [addresses.iloc[first_positions[code]] for code in range(len(uniques))]
+
+        results = [None] * len(uniques)
+        misses = []
+        hits = 0
+        calls_before, errors_before = self.provider_calls, self.errors
+        for code, key in enumerate(uniques):
+            if not key:
+                continue
+            cached = self.cache.get(self._key(key)) if self.cache is not None else None
+            if cached is not None:
+                results[code] = tuple(cached['location']) if cached['location'] else None
+                hits += 1
+            else:
+                misses.append(code)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for code, coordinates in zip(misses, executor.map(lambda c: self._lookup(originals[c], uniques[c]), misses)):
+                results[code] = coordinates
+
+        # One row per distinct address, then a single take maps them back onto every input row
+        table = np.array([r if r else (np.nan, np.nan) for r in results] + [(np.nan, np.nan)], dtype=float)
+        rows = table[codes]
+        print(f"Geocoded {len(addresses)} rows: {sum(1 for key in uniques if key)} distinct addresses, "
+              f"{hits} from cache, {self.provider_calls - calls_before} provider calls, "
+              f"{self.errors - errors_before} errors")
+        return pd.DataFrame({'Latitude': rows[:, 0], 'Longitude': rows[:, 1]}, index=addresses.index)
+
+def geocode_cache(path='geocode_cache.sqlite'):
+    """Persistent geocode cache; geocodes rarely change, so entries never expire."""
+    return PlacesCache(path=path, ttl_seconds=None, max_entries=None)
@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+import shapely
+
+# Cells are squares in degrees: the level-0 cell spans 360 x 360 degrees (the poles sit inside it) and
+# every level splits each cell in four, so a level-z cell is 360 / 2**z degrees on a side.
+MAX_LEVEL = 30
+
+def cell_size(level):
+    """Side of a level's cells in degrees (level 14 is ~0.022, about 2.4 km)."""
+    return 360.0 / 2 ** level
+
+def level_for_step(step):
+    """Level whose cell size is closest to step degrees (0.018, about 2 km, gives level 14).
+
+    Snapping can widen the spacing by up to a factor of sqrt(2) (a 2 km radius still covers a level-14
+    cell) or narrow it as much; describe_level reports the size and point count actually used.
+    """
+    level = int(round(np.log2(360.0 / step)))
+    return min(max(level, 0), MAX_LEVEL)
+
+def describe_level(step, level):
+    """One line on the cells a requested step snapped to and how the point count compares with the step's."""
+    size = cell_size(level)
+    return (f"Grid step {step} -> level {level} cells of {size:.6f} degrees "
+            f"({(step / size) ** 2:.2f}x the points of a {step} degree grid)")
+
+def _cell_indices(lats, lngs, level):
+    size = cell_size(level)
+    x = np.floor((np.asarray(lngs, dtype=float) + 180.0) / size).astype(np.int64)
+    # Rows count down from the top edge (latitude 180) like map tiles
+    y = np.floor((180.0 - np.asarray(lats, dtype=float)) / size).astype(np.int64)
+    top = 2 ** level - 1
+    return np.clip(x, 0, top), np.clip(y, 0, top)
+
+def _keys_from_indices(x, y, level):
+    if level == 0:
+        return np.full(len(x), '', dtype=object)
+    # Digit i of the key is the quadrant at level i+1: (x bit) + 2 * (y bit), most significant first
+    shifts = np.arange(level - 1, -1, -1, dtype=np.int64)
+    digits = ((x[:, None] >> shifts) & 1) + 2 * ((y[:, None] >> shifts) & 1)
+    chars = (digits + ord('0')).astype(np.uint8)
+    return chars.view(f'S{level}').ravel().astype(str).astype(object)
+
+def cell_keys(lats, lngs, level):
+    """Quadkey of the level cell holding each point, e.g. '1302...'; a key's prefixes are its parents."""
+    x, y = _cell_indices(lats, lngs, level)
+    return _keys_from_indices(x, y, level)
+
+def cell_bounds(key):
+    """(min_lat, max_lat, min_lng, max_lng) of a cell."""
+    x = y = 0
+    for digit in key:
+        digit = int(digit)
+        x = (x << 1) | (digit & 1)
+        y = (y << 1) | (digit >> 1)
+    size = cell_size(len(key))
+    max_lat = 180.0 - y * size
+    min_lng = x * size - 180.0
+    return max_lat - size, max_lat, min_lng, min_lng + size
+
+def cell_center(key):
+    """(latitude, longitude) of a cell's centre."""
+    min_lat, max_lat, min_lng, max_lng = cell_bounds(key)
+    return (min_lat + max_lat) / 2, (min_lng + max_lng) / 2
+
+def parent(key, level=None):
+    """Enclosing cell at level (default: one level up)."""
+    return key[:len(key) - 1 if level is None else level]
+
+def children(key):
+    return [key + digit for digit in '0123']
+
+def grid_cells(bbox, level, polygon=None, max_cells=None):
+    """Cells of one level covering a bounding box, as a DataFrame of stable ids and centre points.
+
+    Args:
+        bbox (tuple): (min_lat, max_lat, min_lng, max_lng), as used by gridscrap and maxgrid.
+        level (int): Cell level, see level_for_step.
+        polygon (shapely geometry): If given, keep only cells whose centre lies inside it.
+        max_cells (int): Keep only the first max_cells cells.
+
+    Rows run south to north, west to east within a row. A cell keeps its 'Cell ID' whatever bbox
+    or polygon it is generated for, and the id of its parent at any coarser level is a prefix.
+    """
+    min_lat, max_lat, min_lng, max_lng = bbox
+    x0, y_top = _cell_indices([max_lat], [min_lng], level)
+    x1, y_bottom = _cell_indices([min_lat], [max_lng], level)
+    xs = np.arange(x0[0], x1[0] + 1)
+    ys = np.arange(y_bottom[0], y_top[0] - 1, -1)
+    y, x = np.meshgrid(ys, xs, indexing='ij')
+    x, y = x.ravel(), y.ravel()
+
+    size = cell_size(level)
+    lats = 180.0 - (y + 0.5) * size
+    lngs = x * size - 180.0 + size / 2
+    if polygon is not None:
+        inside = shapely.contains_xy(polygon, lngs, lats)
+        x, y, lats, lngs = x[inside], y[inside], lats[inside], lngs[inside]
+    if max_cells is not None:
+        x, y, lats, lngs = x[:max_cells], y[:max_cells], lats[:max_cells], lngs[:max_cells]
+
+    return pd.DataFrame({
+        'Cell ID': _keys_from_indices(x, y, level),
+        'Level': level,
+        'Latitude': np.round(lats, 6),
+        'Longitude': np.round(lngs, 6),
+    })
+
+def to_csv(cells, path):
+    cells.to_csv(path, index=False)
+
+def to_geoparquet(cells, path, as_polygons=False):
+    """Write cells as GeoParquet with centre points, or with the cell squares if as_polygons."""
+    import geopandas as gpd
+    if as_polygons:
+        bounds = np.array([cell_bounds(key) for key in cells['Cell ID']]).reshape(-1, 4)
+        geometry = shapely.box(bounds[:, 2], bounds[:, 0], bounds[:, 3], bounds[:, 1])
+    else:
+        geometry = shapely.points(cells['Longitude'], cells['Latitude'])
+    gpd.GeoDataFrame(cells, geometry=geometry, crs="EPSG:4326").to_parquet(path)
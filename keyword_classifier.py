@@ -0,0 +1,143 @@
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# Misspellings seen in search keywords and business names, mapped to one spelling (after plural stripping)
+SPELLING_VARIANTS = {
+    'pharmecy': 'pharmacy',
+    'pharmcy': 'pharmacy',
+    'madical': 'medical',
+    'madico': 'medico',
+    'clenic': 'clinic',
+    'clanic': 'clinic',
+    'hospetal': 'hospital',
+    'hospitl': 'hospital',
+    'dawakhan': 'dawakhana',
+    'dispan': 'dispen',
+    'center': 'centre',
+}
+
+# Search keyword groups used to split the Islamabad scrape, first group wins when a keyword is in both
+KEYWORD_GROUPS = {
+    "hospital_related": [
+        "Abortion Clinic", "Acupuncture Clinic", "Acupuncturist", "Addiction Treatment Center",
+        "Adult Day Care Center", "Blood Bank", "Centres", "Chemist", "Chiropractor", "Clinic", "Dentist",
+        "Dialysis Center", "Dispen(sary)", "Doctor", "Dr", "Emergency Room", "Eye Care", "FinalHealth", "Hakeem",
+        "Health", "Hospital", "Mental Health Clinic", "Pathologist", "Physical Therapist", "Psychologist",
+        "Rehabilitation Center", "Skin Care", "Optometrist", "Laboratory", "Veterinarian"
+    ],
+    "pharmacy_related": [
+        "Dawa", "Dawakhana", "Homeo", "Khan", "Matab", "Medical Center", "Medical Store", "Medical Supplies Store",
+        "Medical", "Medicine", "Medico", "Optician", "Pharmacy", "Shop", "Store", "StoresPharmacy"
+    ],
+}
+
+# The three groupings pys/filterMerge.py builds (misspellings fold into the listed spelling)
+MERGE_GROUPS = {
+    "medical_store": [
+        "Chemist", "Dawa", "Dawakhana", "Homeo", "Khan", "Matab", "Medical Store", "Medical Supplies Store",
+        "Medical", "Medicine", "Medico", "Optician", "Pharmacy", "Shop", "Store", "StoresPharmacy"
+    ],
+    "clinic": [
+        "Abortion Clinic", "Acupuncture Clinic", "Clinic", "Dentist", "Doctor", "Dr", "Mental Health Clinic"
+    ],
+    "hospital": [
+        "Acupuncturist", "Addiction Treatment Center", "Adult Day Care Center", "Blood Bank", "Centres",
+        "Chiropractor", "Dialysis Center", "Dispen(sary)", "Emergency Room", "Eye Care", "FinalHealth", "Hakeem",
+        "Health", "Hospital", "Medical Center", "Pathologist", "Physical Therapist", "Psychologist",
+        "Rehabilitation Center", "Skin Care", "Optometrist", "Laboratory", "Veterinarian"
+    ],
+}
+
+def canonical_token(token):
+    """Singular, correctly spelt form of one lower-case token: 'madicos' -> 'medico', 'laboratories' -> 'laboratory'.
+
+    Only regular plurals (-s, -ies) are folded and only the misspellings listed in SPELLING_VARIANTS are
+    corrected; there is no fuzzy matching, so an unlisted typo such as 'hsopital' matches nothing.
+    """
+    if len(token) > 5 and token.endswith('ies'):
+        token = token[:-3] + 'y'
+    elif len(token) > 4 and token.endswith('s') and not token.endswith('ss'):
+        token = token[:-1]
+    return SPELLING_VARIANTS.get(token, token)
+
+def normalise_text(text):
+    """Lower-case ASCII words with misspellings and plurals folded, separated by single spaces."""
+    if not isinstance(text, str):
+        return ''
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode().lower()
+    return ' '.join(canonical_token(token) for token in re.split(r'[^a-z0-9]+', text) if token)
+
+class KeywordClassifier:
+    """Assigns each text to one category in a single pass over an Aho-Corasick automaton.
+
+    Every keyword of every category goes into one automaton, so a text is scanned once no matter how
+    many categories or keywords there are. Texts and keywords are normalised the same way (case,
+    accents, punctuation, -s/-ies plurals and the misspellings listed in SPELLING_VARIANTS; see
+    canonical_token), so 'Pharmecy' matches 'pharmacy'. A keyword that only matched as part of a
+    longer matching keyword is ignored, so 'Medical Center' goes by that keyword rather than by
+    'Centres'; when keywords of several categories still match, the category listed first in
+    `categories` wins.
+
+    Args:
+        categories (dict): Category name -> list of keywords, in order of precedence.
+        default (str): Category for texts that match no keyword.
+        whole_words (bool): If True keywords only match whole words ('dr' does not match 'address');
+                            if False they match anywhere, like str.contains.
+    """
+
+    def __init__(self, categories, default='Other', whole_words=True):
+        try:
+            import ahocorasick
+        except ImportError as e:
+            raise ImportError("KeywordClassifier needs pyahocorasick: pip install pyahocorasick") from e
+        self.categories = list(categories)
+        self.default = default
+        self.whole_words = whole_words
+        self._automaton = ahocorasick.Automaton()
+        for priority, (category, keywords) in enumerate(categories.items()):
+            for keyword in keywords:
+                key = self._pad(normalise_text(keyword))
+                if not key.strip():
+                    continue
+                existing = self._automaton.get(key, None)
+                # The same keyword listed under two categories belongs to the earlier one
+                if existing is None or existing[0] > priority:
+                    self._automaton.add_word(key, (priority, category, len(key)))
+        if len(self._automaton):
+            self._automaton.make_automaton()
+
+    def _pad(self, text):
+        # Spaces on both sides turn word boundaries into ordinary characters for the automaton
+        return f' {text} ' if self.whole_words else text
+
+    def _matches(self, text):
+        # (priority, category) of each keyword match not lying inside a longer match
+        spans = [(end - length + 1, end, priority, category)
+                 for end, (priority, category, length) in self._automaton.iter(self._pad(normalise_text(text)))]
+        return [(priority, category) for start, end, priority, category in spans
+                if not any(other_start <= start and end <= other_end and other_end - other_start > end - start
+                           for other_start, other_end, _, _ in spans)]
+
+    def classify(self, text):
+        """Category of one text."""
+        if not len(self._automaton):
+            return self.default
+        found = self._matches(text)
+        return min(found)[1] if found else self.default
+
+    def matches(self, text):
+        """Every category with a keyword in text, in order of precedence."""
+        if not len(self._automaton):
+            return []
+        found = dict(self._matches(text))
+        return [found[priority] for priority in sorted(found)]
+
+    def classify_series(self, series):
+        """Categories for a pandas Series; each distinct value is classified once."""
+        codes, uniques = pd.factorize(series)
+        # factorize marks missing values with -1, which picks the trailing default label
+        labels = np.array([self.classify(value) for value in uniques] + [self.default], dtype=object)
+        return pd.Series(labels[codes], index=series.index)
@@ -1,30 +1,13 @@
 import os
-import pandas as pd
+from merge_engine import MergeEngine
 
 def merge_csv_files(input_folder, output_file):
     # Get all CSV files from the input folder
-    csv_files = [f for f in os.listdir(input_folder) if f.endswith('.csv')]
-    
-    # Initialize an empty list to hold the dataframes
-    merged_data = []
-    
-    for file in csv_files:
-        file_path = os.path.join(input_folder, file)
-        
-        # Read the CSV file
-        df = pd.read_csv(file_path)
-        
-        # Add a new column 'Category' with the file name (without .csv extension)
-        df['Category'] = file.replace('.csv', '')
-        
-        # Append this dataframe to the list
-        merged_data.append(df)
-    
-    # Concatenate all dataframes into one
-    final_df = pd.concat(merged_data, ignore_index=True)
-    
-    # Write the merged dataframe to the output CSV file
-    final_df.to_csv(output_file, index=False)
+    csv_files = sorted(os.path.join(input_folder, f) for f in os.listdir(input_folder) if f.endswith('.csv'))
+
+    # Tag each row with its file name (without .csv) in 'Category' and keep each place once.
+    # Only files that changed since the last merge are read again.
+    MergeEngine(output_file, source_column='Category').merge(csv_files)
     print(f'Merged CSV saved to {output_file}')
 
 # Example usage
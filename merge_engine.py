@@ -0,0 +1,169 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+# Column names seen across the scraped CSVs, mapped onto the names scrapper.py writes
+COLUMN_ALIASES = {
+    'Place Id': 'Place ID',
+    'place_id': 'Place ID',
+    'PlaceID': 'Place ID',
+    'Name': 'Business Name',
+    'name': 'Business Name',
+    'Business name': 'Business Name',
+    'Lat': 'Latitude',
+    'lat': 'Latitude',
+    'Lng': 'Longitude',
+    'lng': 'Longitude',
+    'Lon': 'Longitude',
+    'lon': 'Longitude',
+    'business_status': 'Status',
+    'vicinity': 'Address',
+    'rating': 'Rating',
+    'user_ratings_total': 'User Ratings',
+}
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def normalise_columns(df, column_map=COLUMN_ALIASES):
+    """Rename known column variants to their canonical names, leaving other columns as they are."""
+    renames = {column: column_map[column] for column in df.columns
+               if column in column_map and column_map[column] not in df.columns}
+    return df.rename(columns=renames)
+
+def read_normalised(path, column_map=COLUMN_ALIASES, source_column=None, source_value=None, chunksize=50000):
+    """Read one CSV in chunks as text (so 'N/A' and ids are kept verbatim) with canonical column names."""
+    chunks = []
+    for chunk in pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunksize):
+        chunk = normalise_columns(chunk, column_map)
+        if source_column:
+            chunk[source_column] = source_value
+        chunks.append(chunk)
+    if not chunks:
+        return pd.DataFrame()
+    return pd.concat(chunks, ignore_index=True)
+
+class MergeEngine:
+    """Incrementally merges CSV files into one output with a shared schema and place id dedup.
+
+    Each input's normalised rows are cached under <output>.merge-cache/ together with a manifest of
+    size, mtime and SHA-256 per file. A re-merge only re-reads files whose content changed; unchanged
+    files come from the cache, and nothing is rewritten when no input changed at all. Only parsing is
+    incremental: when any input changed, the output is rebuilt from the cached parts and rewritten in
+    full. An input that cannot be read is reported and left out of the merge.
+
+    Args:
+        output_file (str): Merged CSV to write.
+        column_map (dict): Column aliases applied to every input.
+        dedupe_on (str): Canonical id column; later rows with an id already seen are dropped. None keeps all rows.
+        source_column (str): If set, each row is tagged with its input file name (without .csv) in this column.
+    """
+
+    def __init__(self, output_file, column_map=COLUMN_ALIASES, dedupe_on='Place ID', source_column=None,
+                 chunksize=50000):
+        self.output_file = output_file
+        self.column_map = column_map
+        self.dedupe_on = dedupe_on
+        self.source_column = source_column
+        self.chunksize = chunksize
+        self.cache_dir = output_file + '.merge-cache'
+        self.manifest_path = os.path.join(self.cache_dir, 'manifest.json')
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {'settings': None, 'files': {}}
+        with open(self.manifest_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_manifest(self):
+        temp_path = self.manifest_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(temp_path, self.manifest_path)
+
+    def _settings(self, files):
+        return {
+            'files': [os.path.abspath(path) for path in files],
+            'column_map': self.column_map,
+            'dedupe_on': self.dedupe_on,
+            'source_column': self.source_column,
+        }
+
+    def _part_path(self, path):
+        return os.path.join(self.cache_dir, hashlib.sha1(os.path.abspath(path).encode()).hexdigest() + '.pkl')
+
+    def _refresh(self, path):
+        """Return (frame, changed) for one input, reading the CSV only if its content changed."""
+        key = os.path.abspath(path)
+        stat = os.stat(path)
+        entry = self.manifest['files'].get(key)
+        part_path = self._part_path(path)
+
+        if entry and os.path.exists(part_path):
+            if entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+                return pd.read_pickle(part_path), False
+            # Touched but possibly unchanged: compare content before paying for a re-parse
+            sha256 = file_sha256(path)
+            if sha256 == entry['sha256']:
+                entry['mtime_ns'] = stat.st_mtime_ns
+                return pd.read_pickle(part_path), False
+        else:
+            sha256 = file_sha256(path)
+
+        source_value = os.path.basename(path).replace('.csv', '')
+        df = read_normalised(path, self.column_map, self.source_column, source_value, self.chunksize)
+        df.to_pickle(part_path)
+        self.manifest['files'][key] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha256}
+        return df, True
+
+    def merge(self, files):
+        """Merge files (in the given order) into output_file and return the number of rows written."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        settings = self._settings(files)
+        if self.manifest.get('settings') != settings:
+            # Different inputs or options: cached parts are still valid per file, but the output is not
+            self.manifest['settings'] = settings
+            self.manifest['output'] = None
+
+        frames = []
+        changed = []
+        for path in files:
+            try:
+                df, was_changed = self._refresh(path)
+            except Exception as e:
+                # One unreadable input should not cost the whole merge; it is retried next time
+                print(f"Error reading {path}: {e}")
+                continue
+            frames.append(df)
+            if was_changed:
+                changed.append(path)
+
+        if not changed and self.manifest.get('output') and os.path.exists(self.output_file):
+            print(f"No inputs changed; {self.output_file} is up to date")
+            self._save_manifest()
+            return self.manifest['output']['rows']
+
+        frames = [df for df in frames if not df.empty]
+        merged = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        if self.dedupe_on and self.dedupe_on in merged.columns:
+            ids = merged[self.dedupe_on]
+            # Rows without an id cannot be matched, so they are always kept
+            keep = (ids == '') | ~ids.duplicated()
+            merged = merged[keep]
+
+        merged.to_csv(self.output_file, index=False)
+        self.manifest['output'] = {'rows': len(merged)}
+        self._save_manifest()
+        print(f"Re-read {len(changed)} of {len(files)} inputs; {len(merged)} rows written to {self.output_file}")
+        return len(merged)
+
+def merge_files(files, output_file, **options):
+    """One-shot helper: merge files into output_file through a MergeEngine (see its arguments)."""
+    return MergeEngine(output_file, **options).merge(files)
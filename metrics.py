@@ -0,0 +1,160 @@
+import atexit
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+class BufferedWriter:
+    """Append-only text file that collects writes in memory and flushes them in batches."""
+
+    def __init__(self, path, buffer_lines=500):
+        self.path = path
+        self.buffer_lines = buffer_lines
+        self._buffer = []
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        with self._lock:
+            self._buffer.append(text)
+            if len(self._buffer) >= self.buffer_lines:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._buffer:
+            return
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(''.join(self._buffer))
+        self._buffer = []
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+def buffered_writer(path):
+    """Return the shared BufferedWriter for path, creating it on first use."""
+    with _writers_lock:
+        if path not in _writers:
+            _writers[path] = BufferedWriter(path)
+        return _writers[path]
+
+def flush_all():
+    """Flush every buffered writer, e.g. at the end of a run or on interrupt."""
+    with _writers_lock:
+        writers = list(_writers.values())
+    for writer in writers:
+        writer.flush()
+
+atexit.register(flush_all)
+
+def percentile(values, q):
+    """Nearest-rank percentile of values (q in 0-100); 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+class EventSink:
+    """Structured JSONL event log for API requests, with in-memory aggregates for the run summary.
+
+    Every event is one JSON object with a 'ts' timestamp and an 'event' name. Request events
+    carry place_type, location, radius, status, latency_ms, results and saturated.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._writer = buffered_writer(path)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.latencies = []
+            self.statuses = {}
+            self.network_calls = 0
+            self.cached_calls = 0
+            self.results = 0
+            self.saturated = 0
+
+    def record(self, event, **fields):
+        entry = {'ts': round(time.time(), 3), 'event': event}
+        entry.update(fields)
+        self._writer.write(json.dumps(entry) + '\n')
+
+        if event != 'request':
+            return
+        with self._lock:
+            status = fields.get('status')
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            if fields.get('cached'):
+                self.cached_calls += 1
+            else:
+                self.network_calls += 1
+                if fields.get('latency_ms') is not None:
+                    self.latencies.append(fields['latency_ms'])
+            self.results += fields.get('results', 0)
+            self.saturated += 1 if fields.get('saturated') else 0
+
+    def summary(self, fetch_seconds=None):
+        """Return latency percentiles, throughput and yield for the requests recorded so far."""
+        with self._lock:
+            calls = self.network_calls + self.cached_calls
+            return {
+                'calls': calls,
+                'network_calls': self.network_calls,
+                'cached_calls': self.cached_calls,
+                'p50_latency_ms': round(percentile(self.latencies, 50), 1),
+                'p95_latency_ms': round(percentile(self.latencies, 95), 1),
+                'calls_per_sec': round(calls / fetch_seconds, 2) if fetch_seconds else None,
+                'results_per_call': round(self.results / calls, 2) if calls else 0.0,
+                'saturation_rate': round(self.saturated / calls, 3) if calls else 0.0,
+                'statuses': dict(self.statuses),
+            }
+
+_sinks = {}
+_sinks_lock = threading.Lock()
+
+def events_for(log_file):
+    """Return the shared EventSink that sits next to a text log (api_calls.log -> api_calls.jsonl)."""
+    path = os.path.splitext(log_file)[0] + '.jsonl'
+    with _sinks_lock:
+        if path not in _sinks:
+            _sinks[path] = EventSink(path)
+        return _sinks[path]
+
+class StageTimer:
+    """Accumulates exclusive wall time per named stage; nested stages pause their parent."""
+
+    def __init__(self):
+        self.totals = {}
+        self._stack = []
+
+    def reset(self):
+        self.totals = {}
+        self._stack = []
+
+    @contextmanager
+    def stage(self, name):
+        now = time.perf_counter()
+        if self._stack:
+            parent, parent_start = self._stack[-1]
+            self.totals[parent] = self.totals.get(parent, 0.0) + now - parent_start
+        self._stack.append((name, now))
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            _, start = self._stack.pop()
+            self.totals[name] = self.totals.get(name, 0.0) + end - start
+            if self._stack:
+                # Resume the parent's clock
+                parent, _ = self._stack[-1]
+                self._stack[-1] = (parent, end)
+
+# Process-wide stage timer used by the scrape pipeline
+stages = StageTimer()
@@ -0,0 +1,245 @@
+import argparse
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from merge_engine import read_normalised
+from region_geometry import METRES_PER_DEGREE
+
+NEARBY_SEARCH_PATH = '/maps/api/place/nearbysearch/json'
+# Nearby Search never returns more than 20 results per page
+MAX_RESULTS = 20
+DEFAULT_TYPE_WEIGHTS = {'pharmacy': 0.45, 'doctor': 0.25, 'hospital': 0.15, 'dentist': 0.15}
+
+def synthetic_businesses(bounds, count, seed=0, clusters=20, cluster_share=0.7, type_weights=DEFAULT_TYPE_WEIGHTS):
+    """Random businesses inside bounds (minx, miny, maxx, maxy in lon/lat): dense markets plus a uniform scatter.
+
+    cluster_share of them sit in `clusters` Gaussian clusters about 800 m wide, the rest are uniform.
+    Returns a DataFrame with the scrapper's Place ID, Business Name, Latitude, Longitude and Type columns.
+    """
+    rng = np.random.default_rng(seed)
+    minx, miny, maxx, maxy = bounds
+    clustered = int(count * cluster_share)
+    centres = np.column_stack([rng.uniform(minx, maxx, clusters), rng.uniform(miny, maxy, clusters)])
+    picks = centres[rng.integers(0, clusters, clustered)]
+    spread = 800 / METRES_PER_DEGREE
+    points = np.vstack([
+        picks + rng.normal(0, spread, (clustered, 2)),
+        np.column_stack([rng.uniform(minx, maxx, count - clustered), rng.uniform(miny, maxy, count - clustered)]),
+    ])
+    types = rng.choice(list(type_weights), size=count, p=np.array(list(type_weights.values())) / sum(type_weights.values()))
+    return pd.DataFrame({
+        'Place ID': [f"mock-{seed}-{i}" for i in range(count)],
+        'Business Name': [f"Mock {place_type.capitalize()} {i}" for i, place_type in enumerate(types)],
+        'Latitude': points[:, 1],
+        'Longitude': points[:, 0],
+        'Type': types,
+    })
+
+def recorded_businesses(paths, default_type='pharmacy'):
+    """Businesses from earlier scrape outputs (Karachi.csv, Lahore.csv, ...), deduplicated on Place ID."""
+    frames = []
+    for path in [paths] if isinstance(paths, str) else paths:
+        df = read_normalised(path)
+        df['Latitude'] = pd.to_numeric(df['Latitude'], errors='coerce')
+        df['Longitude'] = pd.to_numeric(df['Longitude'], errors='coerce')
+        if 'Type' not in df.columns:
+            df['Type'] = default_type
+        df['Type'] = df['Type'].replace('', default_type)
+        frames.append(df.dropna(subset=['Latitude', 'Longitude']))
+    businesses = pd.concat(frames, ignore_index=True)
+    return businesses.drop_duplicates('Place ID').reset_index(drop=True)
+
+class MockPlacesServer:
+    """Local stand-in for the Nearby Search endpoint, serving a fixed set of businesses.
+
+    A request returns the businesses of the requested type inside its circle, nearest first and capped
+    at 20, with the same JSON layout as Google. Point scrapper.py and the pys/ scripts at it with
+    PLACES_API_URL=<server.url>.
+
+    Args:
+        businesses (DataFrame): Place ID, Business Name, Latitude, Longitude and Type per business.
+        latency_ms (float): Mean added response time; each request sleeps a uniform 50-150% of it.
+        error_rate (float): Share of requests answered with HTTP 500.
+        qps_limit (float): Requests per second above which OVER_QUERY_LIMIT is returned (None: unlimited).
+        burst_every (float): Every burst_every seconds, answer OVER_QUERY_LIMIT for burst_seconds.
+        seed (int): Seed for latency and error draws.
+    """
+
+    def __init__(self, businesses, host='127.0.0.1', port=0, latency_ms=0, error_rate=0.0, qps_limit=None,
+                 burst_every=None, burst_seconds=1.0, seed=0):
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.qps_limit = qps_limit
+        self.burst_every = burst_every
+        self.burst_seconds = burst_seconds
+        self.requests = 0
+        self.rejected = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._recent = deque()
+        self._started = time.time()
+
+        self._by_type = {}
+        for place_type, group in businesses.groupby('Type'):
+            self._by_type[place_type] = (
+                group['Latitude'].to_numpy(dtype=float),
+                group['Longitude'].to_numpy(dtype=float),
+                group.to_dict('records'),
+            )
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # HTTP/1.1 keeps pooled client connections alive between requests
+            protocol_version = 'HTTP/1.1'
+            # Headers and body go out in separate writes; with Nagle on, the body waits ~40 ms for the
+            # client's delayed ACK on every keep-alive request
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                status, body = server.handle(self.path)
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}{NEARBY_SEARCH_PATH}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _throttled(self, now):
+        with self._lock:
+            if self.burst_every and (now - self._started) % self.burst_every < self.burst_seconds:
+                self.rejected += 1
+                return True
+            if self.qps_limit:
+                self._recent.append(now)
+                while self._recent and now - self._recent[0] > 1.0:
+                    self._recent.popleft()
+                if len(self._recent) > self.qps_limit:
+                    self.rejected += 1
+                    return True
+            return False
+
+    def handle(self, path):
+        """Answer one request path with (http_status, json_body)."""
+        url = urlparse(path)
+        if url.path != NEARBY_SEARCH_PATH:
+            return 404, {'status': 'NOT_FOUND'}
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        with self._lock:
+            self.requests += 1
+            delay = self.latency_ms * self._rng.uniform(0.5, 1.5) / 1000
+            failed = self._rng.random() < self.error_rate
+        if delay:
+            time.sleep(delay)
+        if failed:
+            return 500, {'status': 'UNKNOWN_ERROR', 'error_message': 'Mock server error'}
+        if self._throttled(time.time()):
+            return 200, {'status': 'OVER_QUERY_LIMIT', 'results': [],
+                         'error_message': 'You have exceeded your rate-limit for this API.'}
+        if not params.get('key'):
+            return 200, {'status': 'REQUEST_DENIED', 'results': [], 'error_message': 'The provided API key is invalid.'}
+        try:
+            lat, lon = map(float, params['location'].split(','))
+            radius = float(params.get('radius', 1000))
+        except (KeyError, ValueError):
+            return 200, {'status': 'INVALID_REQUEST', 'results': []}
+
+        results = self.nearby(lat, lon, radius, params.get('type'))
+        return 200, {'status': 'OK' if results else 'ZERO_RESULTS', 'results': results, 'html_attributions': []}
+
+    def nearby(self, lat, lon, radius, place_type=None):
+        """Up to 20 businesses of place_type (any type if None) within radius metres, nearest first."""
+        if place_type:
+            groups = [self._by_type[place_type]] if place_type in self._by_type else []
+        else:
+            groups = list(self._by_type.values())
+        found = []
+        for lats, lons, records in groups:
+            dy = (lats - lat) * METRES_PER_DEGREE
+            dx = (lons - lon) * METRES_PER_DEGREE * np.cos(np.radians(lat))
+            distances = np.hypot(dx, dy)
+            for i in np.flatnonzero(distances <= radius):
+                found.append((distances[i], records[i]))
+        found.sort(key=lambda entry: entry[0])
+        return [self._place(record) for _, record in found[:MAX_RESULTS]]
+
+    @staticmethod
+    def _place(record):
+        place = {
+            'place_id': record['Place ID'],
+            'name': record.get('Business Name'),
+            'geometry': {'location': {'lat': record['Latitude'], 'lng': record['Longitude']}},
+            'business_status': record.get('Status') or 'OPERATIONAL',
+            'vicinity': record.get('Address') or '',
+            'types': [record['Type'], 'health', 'point_of_interest', 'establishment'],
+        }
+        # Recorded outputs write 'N/A' for unrated places, which the API leaves out
+        try:
+            place['rating'] = float(record['Rating'])
+            place['user_ratings_total'] = int(float(record.get('User Ratings') or 0))
+        except (KeyError, TypeError, ValueError):
+            pass
+        return place
+
+# Usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the Places Nearby Search API.")
+    parser.add_argument("--recorded", nargs="+", help="serve businesses from earlier outputs, e.g. Karachi.csv")
+    parser.add_argument("--bounds", type=float, nargs=4, metavar=("MINX", "MINY", "MAXX", "MAXY"),
+                        default=(66.9, 24.8, 67.2, 25.0), help="lon/lat box for synthetic businesses")
+    parser.add_argument("--count", type=int, default=5000, help="number of synthetic businesses")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--qps-limit", type=float)
+    parser.add_argument("--burst-every", type=float, help="seconds between OVER_QUERY_LIMIT bursts")
+    parser.add_argument("--burst-seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    businesses = recorded_businesses(args.recorded) if args.recorded else synthetic_businesses(args.bounds, args.count)
+    server = MockPlacesServer(businesses, port=args.port, latency_ms=args.latency_ms, error_rate=args.error_rate,
+                              qps_limit=args.qps_limit, burst_every=args.burst_every, burst_seconds=args.burst_seconds)
+    print(f"Serving {len(businesses)} businesses at {server.url}")
+    print(f"Run scrapes against it with PLACES_API_URL={server.url}")
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,224 @@
+import argparse
+import time
+from collections import defaultdict
+from difflib import SequenceMatcher
+from math import cos, floor, radians
+
+import pandas as pd
+
+from keyword_classifier import normalise_text
+from merge_engine import read_normalised
+
+EARTH_RADIUS_M = 6371000
+# Words that say nothing about which business it is, e.g. 'Ali Medical Store' vs 'Ali Medical Stores Pvt Ltd'
+STOP_WORDS = {'the', 'and', 'of', 'pvt', 'ltd', 'private', 'limited', 'co', 'islamabad', 'karachi', 'lahore',
+              'pakistan'}
+# Category words by the kind of business they name. The last one in a name is its head noun:
+# 'Park Lane Hospital Pharmacy' is a pharmacy, 'Iqra Medical Centre' a hospital, 'Sindh Medical' a pharmacy.
+CATEGORY_CLASSES = {
+    'pharmacy': 'pharmacy', 'chemist': 'pharmacy', 'medical': 'pharmacy', 'medico': 'pharmacy', 'store': 'pharmacy',
+    'shop': 'pharmacy', 'dawa': 'pharmacy', 'dawakhana': 'pharmacy', 'drugstore': 'pharmacy', 'herbal': 'pharmacy',
+    'homeo': 'homeopathic', 'homeopathic': 'homeopathic',
+    'clinic': 'clinic', 'matab': 'clinic', 'surgery': 'clinic', 'doctor': 'clinic', 'dr': 'clinic',
+    'hospital': 'hospital', 'centre': 'hospital', 'complex': 'hospital', 'trust': 'hospital',
+    'dental': 'dental', 'dentist': 'dental',
+    'lab': 'lab', 'laboratory': 'lab', 'diagnostic': 'lab',
+}
+# Class of a record with no category word in its name, from the search Type it was found by
+TYPE_CLASSES = {'pharmacy': 'pharmacy', 'hospital': 'hospital', 'doctor': 'clinic', 'dentist': 'dental'}
+# Category words are shared by unrelated businesses of the same kind ('Imran Homeopathic' vs 'German
+# Homeopathic'), so each remaining word of the shorter name needs a match at least this close in the other
+MIN_WORD_SIMILARITY = 0.85
+
+def normalise_name(name):
+    """Lower-case, strip accents and punctuation, fold plurals and misspellings, and drop filler words.
+
+    'Ali Madical Stores Pvt Ltd' -> 'ali medical store'. Category words are kept.
+    """
+    if not isinstance(name, str) or name in ('', 'N/A'):
+        return ''
+    name = normalise_text(name.replace('&', ' and '))
+    return ' '.join(token for token in name.split() if token not in STOP_WORDS)
+
+def category_class(name, place_type=''):
+    """Kind of business a normalised name names ('pharmacy', 'hospital', 'clinic', ...), from its last category word.
+
+    Names without a category word fall back to the search Type, and to '' without one.
+    """
+    for token in reversed(name.split()):
+        if token in CATEGORY_CLASSES:
+            return CATEGORY_CLASSES[token]
+    return TYPE_CLASSES.get(place_type, '')
+
+def _ratio(a, b):
+    if a == b:
+        return 1.0
+    matcher = SequenceMatcher(None, a, b)
+    # quick_ratio is an upper bound, so the full ratio only runs for plausible pairs
+    if matcher.quick_ratio() < 0.5:
+        return 0.0
+    return matcher.ratio()
+
+def _words_covered(short, other):
+    # Short words and numbers ('al', 'ent', branch '2') must match exactly
+    return all(any(word == candidate or (len(word) > 3 and _ratio(word, candidate) >= MIN_WORD_SIMILARITY)
+                   for candidate in other) for word in short)
+
+def name_similarity(a, b):
+    """Similarity in [0, 1] of two normalised names, category words included.
+
+    Every word outside CATEGORY_CLASSES of the name with fewer of them needs a close match in the other,
+    so 'Imran Homeopathic Store' vs 'German Homeopathic Store' and 'Crockery Store 1' vs 'Crockery
+    Store 2' score 0 although they share most characters.
+    """
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    words_a = [token for token in a.split() if token not in CATEGORY_CLASSES]
+    words_b = [token for token in b.split() if token not in CATEGORY_CLASSES]
+    if not words_a or not words_b:
+        return 0.0
+    short, other = (words_a, words_b) if len(words_a) <= len(words_b) else (words_b, words_a)
+    # Initials alone ('A+ Pharmacy' vs 'H.A Pharmacy') say too little to merge on
+    if sum(len(word) for word in short) < 3 or not _words_covered(short, other):
+        return 0.0
+    return _ratio(a, b)
+
+def spatial_cells(lats, lngs, cell_size_m):
+    """Hash each coordinate into a square cell of about cell_size_m metres (local equirectangular projection)."""
+    metres_per_degree = radians(1) * EARTH_RADIUS_M
+    cells = []
+    for lat, lng in zip(lats, lngs):
+        if lat != lat or lng != lng:
+            cells.append(None)
+            continue
+        x = lng * metres_per_degree * cos(radians(lat))
+        y = lat * metres_per_degree
+        cells.append((floor(x / cell_size_m), floor(y / cell_size_m)))
+    return cells
+
+class UnionFind:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, i):
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            # Keep the lower index as root so cluster ids follow input order
+            self.parent[max(a, b)] = min(a, b)
+
+def find_clusters(df, distance_m=50, threshold=0.9):
+    """Group records that are the same business: same place id, or similar names of the same category_class within distance_m.
+
+    Records are hashed into distance_m cells and names are only compared against records in the same
+    or one of the 8 neighbouring cells, so the work grows with the number of records rather than pairs.
+    Returns a list with the cluster root index of every row (rows are positions in df).
+    """
+    lats = pd.to_numeric(df['Latitude'], errors='coerce').tolist()
+    lngs = pd.to_numeric(df['Longitude'], errors='coerce').tolist()
+    names = [normalise_name(name) for name in df['Business Name'].tolist()]
+    types = df['Type'].tolist() if 'Type' in df.columns else [''] * len(df)
+    classes = [category_class(name, place_type) for name, place_type in zip(names, types)]
+    ids = df['Place ID'].tolist() if 'Place ID' in df.columns else [''] * len(df)
+
+    clusters = UnionFind(len(df))
+    # Exact id matches, as in the scrapers' own dedup; 'na_noloc' marks a search with no results
+    first_by_id = {}
+    for i, place_id in enumerate(ids):
+        if not place_id or place_id == 'na_noloc':
+            continue
+        if place_id in first_by_id:
+            clusters.union(first_by_id[place_id], i)
+        else:
+            first_by_id[place_id] = i
+
+    buckets = defaultdict(list)
+    for i, cell in enumerate(spatial_cells(lats, lngs, distance_m)):
+        if cell is not None and names[i]:
+            buckets[cell].append(i)
+
+    max_dist2 = distance_m ** 2
+    metres_per_degree = radians(1) * EARTH_RADIUS_M
+    # Half of the neighbourhood is enough: each pair of cells is visited once from one side
+    neighbours = [(0, 0), (1, -1), (1, 0), (1, 1), (0, 1)]
+    for (cx, cy), members in buckets.items():
+        for dx, dy in neighbours:
+            others = buckets.get((cx + dx, cy + dy))
+            if not others:
+                continue
+            same_cell = dx == 0 and dy == 0
+            for a_pos, a in enumerate(members):
+                candidates = others[a_pos + 1:] if same_cell else others
+                for b in candidates:
+                    if clusters.find(a) == clusters.find(b):
+                        continue
+                    dy_m = (lats[a] - lats[b]) * metres_per_degree
+                    dx_m = (lngs[a] - lngs[b]) * metres_per_degree * cos(radians(lats[a]))
+                    if dx_m * dx_m + dy_m * dy_m > max_dist2:
+                        continue
+                    if classes[a] == classes[b] and name_similarity(names[a], names[b]) >= threshold:
+                        clusters.union(a, b)
+
+    return [clusters.find(i) for i in range(len(df))]
+
+def completeness(row):
+    return sum(1 for value in row if isinstance(value, str) and value not in ('', 'N/A'))
+
+def label_clusters(df, distance_m=50, threshold=0.9):
+    """Return df with 'Cluster ID', 'Cluster Size' and 'Canonical' columns added.
+
+    The canonical record of a cluster is its most complete row (most filled-in fields), ties going to
+    the row with the most user ratings and then to the earliest row.
+    """
+    df = df.reset_index(drop=True)
+    roots = find_clusters(df, distance_m, threshold)
+    cluster_ids = pd.Series(roots).rank(method='dense').astype(int) - 1
+
+    filled = [completeness(row) for row in df.itertuples(index=False)]
+    ratings = pd.to_numeric(df['User Ratings'], errors='coerce').fillna(0) if 'User Ratings' in df.columns \
+        else pd.Series(0, index=df.index)
+    order = pd.DataFrame({'cluster': cluster_ids, 'filled': filled, 'ratings': ratings, 'row': df.index})
+    order = order.sort_values(['cluster', 'filled', 'ratings', 'row'], ascending=[True, False, False, True])
+    canonical_rows = set(order.drop_duplicates('cluster')['row'])
+
+    df['Cluster ID'] = cluster_ids
+    df['Cluster Size'] = df.groupby('Cluster ID')['Cluster ID'].transform('size')
+    df['Canonical'] = df.index.isin(canonical_rows)
+    return df
+
+def load_corpus(paths):
+    """Read CSVs into one frame with the scrapper column names and a 'Source' column per file."""
+    frames = [read_normalised(path, source_column='Source', source_value=path) for path in paths]
+    return pd.concat(frames, ignore_index=True)
+
+# Usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cluster near-duplicate businesses across scraped CSVs.")
+    parser.add_argument("inputs", nargs="+", help="CSV files, e.g. Karachi.csv Lahore.csv pys/Islamabad.csv")
+    parser.add_argument("--output", default="clusters.csv", help="every record with its cluster and canonical flag")
+    parser.add_argument("--deduped", help="optional CSV with only the canonical record of each cluster")
+    parser.add_argument("--distance", type=float, default=50, help="max distance in metres between duplicates")
+    parser.add_argument("--threshold", type=float, default=0.9, help="min name similarity (0-1)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    corpus = load_corpus(args.inputs)
+    labelled = label_clusters(corpus, args.distance, args.threshold)
+    elapsed = time.perf_counter() - start
+
+    duplicates = labelled[labelled['Cluster Size'] > 1]
+    print(f"{len(labelled)} records -> {labelled['Cluster ID'].nunique()} businesses "
+          f"({duplicates['Cluster ID'].nunique()} clusters with duplicates) in {elapsed:.2f}s")
+    labelled.sort_values(['Cluster ID', 'Canonical'], ascending=[True, False]).to_csv(args.output, index=False)
+    print(f"Clusters saved to {args.output}")
+    if args.deduped:
+        labelled[labelled['Canonical']].drop(columns=['Cluster ID', 'Cluster Size', 'Canonical']) \
+            .to_csv(args.deduped, index=False)
+        print(f"Canonical records saved to {args.deduped}")
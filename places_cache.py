@@ -0,0 +1,136 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Coordinates are rounded to 5 decimals (~1 m) so re-planned grids hit the same entries
+LOCATION_PRECISION = 5
+
+class PlacesCache:
+    """SQLite-backed cache of Nearby Search responses with TTL expiry and LRU eviction.
+
+    Args:
+        path (str): SQLite file that holds the cache.
+        ttl_seconds (int): Age after which an entry is treated as a miss and dropped.
+        max_entries (int): Size cap; the least recently used entries are evicted past it.
+        replay_only (bool): If True, callers must not touch the network on a miss.
+    """
+
+    def __init__(self, path='places_cache.sqlite', ttl_seconds=30 * 24 * 3600, max_entries=200000, replay_only=False):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.replay_only = replay_only
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # One connection shared by the fetch worker threads, guarded by a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON responses (last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(location, radius, place_type, keyword='', language=''):
+        """Build the cache key for a Nearby Search request."""
+        lat, lon = location
+        return json.dumps([
+            round(float(lat), LOCATION_PRECISION),
+            round(float(lon), LOCATION_PRECISION),
+            int(radius),
+            place_type or '',
+            keyword or '',
+            language or '',
+        ])
+
+    def get(self, key):
+        """Return the cached response dict for key, or None on a miss or expired entry."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            response, created_at = row
+            if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(response)
+
+    def put(self, key, data):
+        """Store a response dict and evict the least recently used entries past max_entries."""
+        if self.replay_only:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(data), now, now)
+            )
+            if self.max_entries is not None:
+                count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+                excess = count - self.max_entries
+                if excess > 0:
+                    self._conn.execute(
+                        "DELETE FROM responses WHERE key IN "
+                        "(SELECT key FROM responses ORDER BY last_access ASC LIMIT ?)",
+                        (excess,)
+                    )
+                    self.evictions += excess
+            self._conn.commit()
+
+    def stats(self):
+        """Return hit/miss/eviction counters and the current number of entries."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': entries,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def cache_from_env(path='places_cache.sqlite'):
+    """Create a PlacesCache configured from PLACES_CACHE_* environment variables.
+
+    PLACES_CACHE_DISABLED=1 turns caching off, PLACES_REPLAY_ONLY=1 serves only cached responses,
+    PLACES_CACHE_TTL_DAYS and PLACES_CACHE_MAX_ENTRIES override the expiry and size cap.
+    """
+    if os.getenv("PLACES_CACHE_DISABLED") == "1":
+        return None
+    return PlacesCache(
+        path=os.getenv("PLACES_CACHE_PATH", path),
+        ttl_seconds=float(os.getenv("PLACES_CACHE_TTL_DAYS", 30)) * 24 * 3600,
+        max_entries=int(os.getenv("PLACES_CACHE_MAX_ENTRIES", 200000)),
+        replay_only=os.getenv("PLACES_REPLAY_ONLY") == "1",
+    )
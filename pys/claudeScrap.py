@@ -4,10 +4,18 @@ import pandas as pd
 import requests
 from dotenv import load_dotenv
 import os
+import sys
+
+# Shared helpers live in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from places_cache import PlacesCache, cache_from_env
 
 # Load environment variables from .env file
 load_dotenv()
 
+# On-disk response cache shared with scrapper.py (PLACES_REPLAY_ONLY=1 for offline reruns)
+cache = cache_from_env()
+
 # Function to load the polygon from a shapefile
 def load_polygon_from_shapefile(shapefile_path):
     gdf = gpd.read_file(shapefile_path)
@@ -21,13 +29,24 @@ def is_within_polygon(lat, lng, polygon):
 
 # Function to fetch places from Google Places API
 def fetch_places(api_key, location, radius=2000, type_filter='hospital', raw_response=False):
-    base_url = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
+    base_url = os.getenv("PLACES_API_URL", "https://maps.googleapis.com/maps/api/place/nearbysearch/json")
     params = {
         'key': api_key,
         'location': f"{location[0]},{location[1]}",
         'radius': radius,
         'type': type_filter,
     }
+    
+    # Serve repeated queries from the cache
+    cache_key = PlacesCache.make_key(location, radius, type_filter)
+    if cache is not None and not raw_response:
+        data = cache.get(cache_key)
+        if data is not None:
+            return data.get('results', [])
+        if cache.replay_only:
+            print(f"Cache miss in replay-only mode: {type_filter} at {location}")
+            return []
+    
     response = requests.get(base_url, params=params)
     
     if raw_response:
@@ -37,6 +56,8 @@ def fetch_places(api_key, location, radius=2000, type_filter='hospital', raw_res
         data = response.json()
         print("API Response Status:", data.get('status'))
         print("Error Message:", data.get('error_message', 'No error message'))
+        if cache is not None and data.get('status') in ('OK', 'ZERO_RESULTS'):
+            cache.put(cache_key, data)
         return data.get('results', [])
     else:
         print(f"Error: {response.status_code} - {response.text}")
@@ -1,44 +1,31 @@
+import os
+import sys
+
 import pandas as pd
-from geopy.geocoders import Nominatim
 
-def address_to_coordinates(city, area, store_name):
-    address = f"{store_name}, {area}, {city}"
-    geolocator = Nominatim(user_agent="my_geocoder")
-    location = geolocator.geocode(address)
-    if location:
-        return location.latitude, location.longitude
-    else:
-        return None
+# Allow importing the top-level geocoding module when run from pys/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from geocoding import Geocoder, NominatimProvider, geocode_cache
+
+def store_addresses(store_data):
+    # "<StoreName>, <Area>, <City>" for every row at once
+    # Replace 'City', 'Area' and 'StoreName' with the actual column names in your Excel sheet
+    return store_data['StoreName'].astype(str) + ", " + store_data['Area'].astype(str) + ", " + store_data['City'].astype(str)
 
 # Read store data from Excel
 excel_file_path = 'path/to/your/excel/file.xlsx'  # Replace with the actual path
 store_data = pd.read_excel(excel_file_path)
 
-# Create empty lists to store results
-latitudes = []
-longitudes = []
-
-# Iterate over rows in the store data
-for index, row in store_data.iterrows():
-    city = row['City']  # Replace 'City' with the actual column name in your Excel sheet
-    area = row['Area']  # Replace 'Area' with the actual column name in your Excel sheet
-    store_name = row['StoreName']  # Replace 'StoreName' with the actual column name in your Excel sheet
-    
-    # Call the function to get coordinates
-    coordinates = address_to_coordinates(city, area, store_name)
-    
-    if coordinates:
-        # Store the coordinates in the respective lists
-        latitudes.append(coordinates[0])
-        longitudes.append(coordinates[1])
-    else:
-        # Handle cases where coordinates are not found
-        latitudes.append(None)
-        longitudes.append(None)
+# Repeated addresses are geocoded once and answers are kept in geocode_cache.sqlite between runs.
+# Set NOMINATIM_DOMAIN (e.g. localhost:8080) and NOMINATIM_SCHEME=http to use a local Nominatim.
+provider = NominatimProvider(user_agent="my_geocoder", domain=os.getenv("NOMINATIM_DOMAIN"),
+                             scheme=os.getenv("NOMINATIM_SCHEME"), rate=float(os.getenv("NOMINATIM_RATE", 1)))
+with geocode_cache() as cache:
+    coordinates = Geocoder(provider, cache=cache).geocode_series(store_addresses(store_data))
 
-# Add latitude and longitude columns to the original store data
-store_data['Latitude'] = latitudes
-store_data['Longitude'] = longitudes
+# Add latitude and longitude columns to the original store data; addresses not found stay empty
+store_data['Latitude'] = coordinates['Latitude']
+store_data['Longitude'] = coordinates['Longitude']
 
 # Save the updated store data to a new Excel file
 output_excel_path = 'path/to/your/output/file.xlsx'  # Replace with the desired output path
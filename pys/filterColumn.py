@@ -1,9 +1,16 @@
 import pandas as pd
 import os
+import sys
+
+# Allow importing the top-level category_store module when run from pys/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from category_store import write_categorized
 
 # Load the CSV file
 input_file = "Islamabad.csv"  # Replace with your CSV file path
 output_folder = "categorized_csvs"
+store_root = "categorized.parquet"  # Partitioned by city / keyword group / keyword
+city = "Islamabad"
 
 # Create the output directory if it doesn't exist
 os.makedirs(output_folder, exist_ok=True)
@@ -21,4 +28,8 @@ for keyword, group in df.groupby("SearchKeyword"):
     group.to_csv(filename, index=False)
     print(f"Saved: {filename}")
 
+# Store the same rows once as a partitioned dataset; query it with category_store.query
+rows = write_categorized(df, store_root, city)
+print(f"Stored {rows} rows in {store_root}")
+
 print("Categorization complete!")
@@ -1,50 +1,74 @@
-import pandas as pd
 import os
+import sys
 from glob import glob
 
+# Allow importing the top-level merge_engine module when run from pys/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from merge_engine import MergeEngine
+from category_store import query
+
 def merge_csv_files(input_folder, output_file, file_list=None):
     """
     Merges multiple CSV files from a given folder into a single file.
-    
+
+    Column names are normalised to the scrapper schema ('Place Id' -> 'Place ID', 'Name' -> 'Business Name')
+    and each place is kept once. Unchanged inputs are served from <output_file>.merge-cache/.
+
     Parameters:
     - input_folder (str): The folder containing CSV files.
     - output_file (str): The name of the merged output file.
     - file_list (list, optional): Specific files to merge. If None, merges all CSVs in the folder.
-    
+
     Returns:
     - None: Saves the merged file to disk.
     """
     # If no specific files are given, merge all CSVs in the folder
     if file_list is None:
-        file_list = glob(os.path.join(input_folder, "*.csv"))
+        file_list = sorted(glob(os.path.join(input_folder, "*.csv")))
     else:
         # Ensure filenames are correct without "./"
         file_list = [os.path.join(input_folder, f.lstrip("./")) for f in file_list]
 
-    df_list = []
-
-    # Read and merge all CSV files
+    existing = []
     for file in file_list:
         if os.path.exists(file):
-            try:
-                df = pd.read_csv(file)
-                df_list.append(df)
-                print(f"Loaded: {file}")
-            except Exception as e:
-                print(f"Error reading {file}: {e}")
+            existing.append(file)
         else:
             print(f"File not found: {file}")
 
-    if not df_list:
+    if not existing:
         print("No valid files to merge. Exiting.")
         return
 
-    merged_df = pd.concat(df_list, ignore_index=True)
-
-    # Save the merged file
-    merged_df.to_csv(output_file, index=False)
+    MergeEngine(output_file).merge(existing)
     print(f"Merged file saved as: {output_file}")
 
+def merge_from_store(store_root, output_file, city, group=None, keywords=None, columns=None):
+    """
+    Writes one grouping straight from the category store written by filterColumn.py.
+
+    Only the partitions of the requested city, keyword group and/or keywords are read, so no
+    per-keyword CSVs need to be listed or parsed. Each place is kept once.
+
+    Parameters:
+    - store_root (str): Root of the category store, e.g. "categorized.parquet".
+    - output_file (str): The name of the merged output file.
+    - city (str): City partition, e.g. "Islamabad".
+    - group (str, optional): Keyword group, "medical_store", "clinic" or "hospital" (see MERGE_GROUPS).
+    - keywords (list, optional): Search keywords without the city, e.g. ["Pharmacy", "Chemist"].
+    - columns (list, optional): Columns to read. If None, reads all.
+    """
+    df = query(store_root, city=city, group=group, keyword=keywords, columns=columns)
+    if "Place ID" in df.columns:
+        df = df[df["Place ID"].isna() | ~df["Place ID"].duplicated()]
+    df.to_csv(output_file, index=False)
+    print(f"Merged file saved as: {output_file} ({len(df)} rows)")
+
+# Medical Store, Clinic and Hospital groupings from the category store usage (same keywords as the lists below)
+# merge_from_store("categorized.parquet", "merged.csv", "Islamabad", group="medical_store")
+# merge_from_store("categorized.parquet", "merged.csv", "Islamabad", group="clinic")
+# merge_from_store("categorized.parquet", "merged.csv", "Islamabad", group="hospital")
+
 # Clinic Keyword to merge usage
 # merge_csv_files("Islamabad_categorized_csvs", "merged.csv", [
 #     "./Abortion Clinic, Islamabad.csv",
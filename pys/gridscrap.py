@@ -1,32 +1,23 @@
+import os
+import sys
+
 import pandas as pd
 
+# Allow importing the top-level grid_cells module when run from pys/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from grid_cells import describe_level, grid_cells, level_for_step
+
 def generate_grid_with_names(bbox, step):
     """
     Generate grid points with names, latitudes, and longitudes.
+
+    Names are stable cell ids from grid_cells: a cell keeps its name when the bbox changes, and the
+    step is snapped to the nearest cell level.
     """
-    min_lat, max_lat, min_lng, max_lng = bbox
-    grid_data = []
-
-    # Generate grid points with unique names
-    row_index = 1
-    lat = min_lat
-    while lat <= max_lat:
-        col_index = 1
-        lng = min_lng
-        while lng <= max_lng:
-            # Generate grid name in "Row-Col" format
-            grid_name = f"Grid-{row_index}-{col_index}"
-            grid_data.append({
-                "Grid Name": grid_name,
-                "Latitude": round(lat, 6),
-                "Longitude": round(lng, 6)
-            })
-            lng += step  # Move to the next longitude
-            col_index += 1
-        lat += step  # Move to the next latitude
-        row_index += 1
-
-    return grid_data
+    level = level_for_step(step)
+    print(describe_level(step, level))
+    cells = grid_cells(bbox, level)
+    return cells.rename(columns={"Cell ID": "Grid Name"})[["Grid Name", "Latitude", "Longitude"]].to_dict("records")
 
 # Karachi's bounding box and grid step size
 karachi_bbox = (24.698307388893962, 25.743251280693435, 66.62466586784075, 67.7379432267916)
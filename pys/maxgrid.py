@@ -1,38 +1,59 @@
 import requests
 import pandas as pd
+import os
+import sys
 
-# Function to generate grid points
-def generate_grid(bbox, step, max_grids=20):
-    min_lat, max_lat, min_lng, max_lng = bbox
-    grid_points = []
-    count = 0  # Counter to track number of grids generated
-    
-    # Generate latitude and longitude points
-    lat = min_lat
-    while lat <= max_lat:
-        lng = min_lng
-        while lng <= max_lng:
-            grid_points.append((lat, lng))
-            count += 1
-            if count >= max_grids:  # Stop once we reach max_grids
-                return grid_points
-            lng += step  # Move to the next longitude
-        lat += step  # Move to the next latitude
+# Shared helpers live in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from places_cache import PlacesCache, cache_from_env
+from grid_cells import describe_level, grid_cells, level_for_step
+from budget_planner import load_density, plan_within_budget
+
+# On-disk response cache shared with scrapper.py (PLACES_REPLAY_ONLY=1 for offline reruns)
+cache = cache_from_env()
+
+# Function to generate grid points as (lat, lng, cell id) on the shared cell grid.
+# With density_files (earlier outputs such as Karachi.csv) the max_grids points are the ones expected
+# to find the most businesses, instead of the first max_grids in the bottom-left corner of the bbox.
+def generate_grid(bbox, step, max_grids=20, density_files=None, radius=2000, type_filter='hospital'):
+    level = level_for_step(step)
+    print(describe_level(step, level))
+    if not density_files:
+        cells = grid_cells(bbox, level, max_cells=max_grids)
+        return list(zip(cells['Latitude'], cells['Longitude'], cells['Cell ID']))
 
-    return grid_points
+    cells = grid_cells(bbox, level)
+    schedule = [(cell_id, (lat, lng), [(0, type_filter, radius)])
+                for cell_id, lat, lng in zip(cells['Cell ID'], cells['Latitude'], cells['Longitude'])]
+    schedule, _ = plan_within_budget(schedule, max_grids, load_density(density_files))
+    return [(point[0], point[1], cell_id) for cell_id, point, _ in schedule]
 
 # Function to fetch data from Google Places API
 def fetch_places(api_key, location, radius=2000, type_filter='hospital'):
-    base_url = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
+    base_url = os.getenv("PLACES_API_URL", "https://maps.googleapis.com/maps/api/place/nearbysearch/json")
     params = {
         'key': api_key,
         'location': f"{location[0]},{location[1]}",
         'radius': radius,
         'type': type_filter,
     }
+    
+    # Serve repeated queries from the cache
+    cache_key = PlacesCache.make_key(location, radius, type_filter)
+    if cache is not None:
+        data = cache.get(cache_key)
+        if data is not None:
+            return data.get('results', [])
+        if cache.replay_only:
+            print(f"Cache miss in replay-only mode: {type_filter} at {location}")
+            return []
+    
     response = requests.get(base_url, params=params)
     if response.status_code == 200:
-        return response.json().get('results', [])
+        data = response.json()
+        if cache is not None and data.get('status') in ('OK', 'ZERO_RESULTS'):
+            cache.put(cache_key, data)
+        return data.get('results', [])
     else:
         print(f"Error: {response.status_code} - {response.text}")
         return []
@@ -44,13 +65,15 @@ api_key = "YOUR_GOOGLE_PLACES_API_KEY"  # Replace with your actual key
 karachi_bbox = (24.75, 25.45, 66.60, 67.10)  # (min_lat, max_lat, min_lng, max_lng)
 grid_step = 0.018  # ~2 km radius
 
-# Generate the first 20 grid points
-grid_points = generate_grid(karachi_bbox, grid_step, max_grids=20)
+# Spend a budget of 20 searches where earlier scrapes found the most businesses
+density_files = [path for path in ["Karachi.csv"] if os.path.exists(path)]
+grid_points = generate_grid(karachi_bbox, grid_step, max_grids=20, density_files=density_files)
 
 # Fetch data for each grid and store results
 all_places = []
-for point in grid_points:
-    print(f"Fetching data for grid center: {point}")
+for lat, lng, cell_id in grid_points:
+    point = (lat, lng)
+    print(f"Fetching data for grid cell {cell_id} centered at: {point}")
     places = fetch_places(api_key, point)
     
     # Process and append place details
@@ -61,7 +84,8 @@ for point in grid_points:
             'Longitude': place.get("geometry", {}).get("location", {}).get("lng"),
             'Category': ", ".join(place.get("types", [])),
             'Status': place.get("business_status", 'UNKNOWN'),
-            'Grid Center': f"{point[0]},{point[1]}"
+            'Grid Center': f"{point[0]},{point[1]}",
+            'Grid Cell': cell_id
         })
 
 # Save the data to an Excel file
@@ -1,5 +1,10 @@
 import pandas as pd
 import os
+import sys
+
+# Allow importing the top-level keyword_classifier module when run from pys/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from keyword_classifier import KEYWORD_GROUPS, KeywordClassifier
 
 # Load the CSV file
 input_file = "Islamabad.csv"  # Replace with your CSV file path
@@ -13,33 +18,13 @@ df = pd.read_csv(input_file)
 if "SearchKeyword" not in df.columns:
     raise ValueError("Column 'SearchKeyword' not found in the CSV file.")
 
-# Define keyword groups
-keyword_groups = {
-    "hospital_related": [
-        "Abortion Clinic", "Acupuncture Clinic", "Acupuncturist", "Addiction Treatment Center",
-        "Adult Day Care Center", "Blood Bank", "Centres", "Chemist", "Chiropractor", "Clanic",
-        "Clenic", "Clinic", "Dentist", "Dialysis Center", "Dispan(sary)", "Dispen(sary)", "Doctor",
-        "Dr", "Dr.", "Emergency Room", "Eye Care", "FinalHealth", "Hakeem", "Health", "Hospetal",
-        "Hospital", "Mental Health Clinic", "Pathologist", "Physical Therapist", "Psychologist",
-        "Rehabilitation Center", "Skin Care", "Optometrist", "Laboratory", "Veterinarian"
-    ],
-    "pharmacy_related": [
-        "Dawa", "Dawakhan", "Dawakhana", "Homeo", "Khan", "Madical", "Madico", "Madicos", "Matab",
-        "Medical Center", "Medical Store", "Medical Supplies Store", "Medical", "Medicine", "Medico",
-        "Medicos", "Optician", "Pharmacy", "Pharmecy", "Shop", "Store", "Stores", "StoresPharmacy"
-    ]
-}
-
-# Convert SearchKeyword column to lowercase for easier matching
-df["SearchKeyword_lower"] = df["SearchKeyword"].str.lower()
-
-# Filter data based on hospital-related keywords
-hospital_keywords_lower = [keyword.lower() for keyword in keyword_groups["hospital_related"]]
-hospital_df = df[df["SearchKeyword_lower"].isin(hospital_keywords_lower)]
-
-# Filter data based on pharmacy-related keywords
-pharmacy_keywords_lower = [keyword.lower() for keyword in keyword_groups["pharmacy_related"]]
-pharmacy_df = df[df["SearchKeyword_lower"].isin(pharmacy_keywords_lower)]
+# Assign every row to a keyword group in one pass (see KEYWORD_GROUPS); misspelt keywords
+# such as 'Pharmecy' or 'Clenic' fold into their group without being listed
+classifier = KeywordClassifier(KEYWORD_GROUPS)
+df["KeywordGroup"] = classifier.classify_series(df["SearchKeyword"])
+
+hospital_df = df[df["KeywordGroup"] == "hospital_related"].drop(columns="KeywordGroup")
+pharmacy_df = df[df["KeywordGroup"] == "pharmacy_related"].drop(columns="KeywordGroup")
 
 # Save hospital-related data to a CSV file
 if not hospital_df.empty:
@@ -1,6 +1,13 @@
+import os
+import sys
+
 import pandas as pd
 import openpyxl
 
+# Allow importing the top-level keyword_classifier module when run from pys/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from keyword_classifier import KeywordClassifier
+
 def categorize_excel(input_file: str, output_file: str, categories: dict, separate_sheets: bool = True):
     """
     Categorize data in an Excel file.
@@ -9,6 +16,7 @@ def categorize_excel(input_file: str, output_file: str, categories: dict, separa
         input_file (str): Path to the input Excel file.
         output_file (str): Path to save the categorized Excel file.
         categories (dict): Dictionary with category names as keys and lists of keywords as values.
+                           A name matching several categories gets the one listed first.
         separate_sheets (bool): If True, separate data into different sheets by category.
                                If False, add a 'Category' column to the original data.
     """
@@ -24,11 +32,9 @@ def categorize_excel(input_file: str, output_file: str, categories: dict, separa
         print("The input file must have a 'Name' column.")
         return
 
-    # Add a category column
-    df["Category"] = "Other"  # Default category
-    for category, keywords in categories.items():
-        mask = df["Name"].str.contains('|'.join(keywords), case=False, na=False)
-        df.loc[mask, "Category"] = category
+    # Add a category column in one pass; unmatched names fall into "Other"
+    classifier = KeywordClassifier(categories, default="Other", whole_words=False)
+    df["Category"] = classifier.classify_series(df["Name"])
 
     if separate_sheets:
         # Separate data into different sheets
@@ -12,8 +12,8 @@ def test_google_places_api():
     radius = 1000  # 1 km radius for testing
     type_filter = "hospital"  # Example type filter
     
-    # Base URL
-    base_url = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
+    # Base URL (PLACES_API_URL points it at a local mock_places_server)
+    base_url = os.getenv("PLACES_API_URL", "https://maps.googleapis.com/maps/api/place/nearbysearch/json")
     
     # Request parameters
     params = {
@@ -0,0 +1,113 @@
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+# Answers that mean "slow down": Places quota errors, HTTP 429 and server-side failures
+THROTTLE_STATUSES = {'OVER_QUERY_LIMIT', 'RESOURCE_EXHAUSTED'}
+# Answers that will not change on retry
+PERMANENT_STATUSES = {'REQUEST_DENIED', 'INVALID_REQUEST', 'NOT_FOUND'}
+
+class PlacesFetchError(Exception):
+    """A search that still failed after its retries; its unit is left out of the journal so --resume refetches it."""
+
+def classify_response(http_status, api_status=None):
+    """Sort one answer into 'ok', 'throttled' (back off and retry), 'error' (retry) or 'fatal' (give up)."""
+    if http_status == 429 or api_status in THROTTLE_STATUSES:
+        return 'throttled'
+    if http_status >= 500:
+        return 'throttled'
+    if http_status != 200 or api_status in PERMANENT_STATUSES:
+        return 'fatal'
+    if api_status in ('OK', 'ZERO_RESULTS'):
+        return 'ok'
+    # UNKNOWN_ERROR and anything new: Google documents these as worth retrying
+    return 'error'
+
+class RateLimiter:
+    """Spaces acquire() calls at least 1/rate seconds apart; a falsy rate never waits.
+
+    On its own it paces the threads of one process. Given a multiprocessing lock and a shared double
+    (multiprocessing.Value('d')) as next_slot, it paces every process holding them, e.g. batch_scrape's
+    workers sharing one global request budget.
+    """
+
+    def __init__(self, rate, lock=None, next_slot=None):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.lock = lock if lock is not None else threading.Lock()
+        self.next_slot = next_slot if next_slot is not None else SimpleNamespace(value=0.0)
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.time()
+            slot = max(now, self.next_slot.value)
+            self.next_slot.value = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+class AIMDController:
+    """Limits requests in flight with additive-increase / multiplicative-decrease, like TCP congestion control.
+
+    Every healthy answer grows the limit by increase / limit, so a full window of successes adds
+    `increase`. A throttling answer multiplies it by `decrease`, at most once per `cooldown` seconds so a
+    burst of failures from requests already in flight counts as one signal.
+
+    Args:
+        initial (float): Starting limit.
+        minimum (float): Floor for the limit.
+        maximum (float): Ceiling, normally the number of worker threads.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=16, increase=1.0, decrease=0.5, cooldown=1.0):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.peak = self.limit
+        self.backoffs = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self, outcome):
+        """Return a slot and adjust the limit for the answer it got (see classify_response)."""
+        with self._condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if outcome == 'ok':
+                self.limit = min(self.maximum, self.limit + self.increase / self.limit)
+                self.peak = max(self.peak, self.limit)
+            elif outcome == 'throttled' and now - self._last_decrease >= self.cooldown:
+                self.limit = max(self.minimum, self.limit * self.decrease)
+                self._last_decrease = now
+                self.backoffs += 1
+            self._condition.notify_all()
+
+    def stats(self):
+        with self._condition:
+            return {'limit': round(self.limit, 2), 'peak': round(self.peak, 2), 'backoffs': self.backoffs}
+
+class RetryPolicy:
+    """Full-jitter exponential backoff: attempt n waits a uniform 0..min(max_delay, base_delay * 2**n) seconds."""
+
+    def __init__(self, max_attempts=6, base_delay=0.5, max_delay=30.0, seed=None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._random = random.Random(seed)
+
+    def delay(self, attempt):
+        return self._random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def should_retry(self, outcome, attempt):
+        return outcome in ('throttled', 'error') and attempt + 1 < self.max_attempts
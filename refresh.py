@@ -0,0 +1,311 @@
+import argparse
+import datetime
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from shapely.strtree import STRtree
+
+import scrapper
+from merge_engine import read_normalised
+from metrics import flush_all
+from rate_control import AIMDController, PlacesFetchError
+from region_cache import region_cache_from_env
+from region_geometry import local_projector, within_distance
+from scrapper import (DEFAULT_MAX_WORKERS, MAX_RESULTS_PER_QUERY, SEARCH_TYPES, build_search_plan,
+                      cached_search_plan, collect_places, create_session, haversine_distance, load_region,
+                      run_sentinel_searches, submit_search)
+
+# Circles where at least this share of places has no reviews yet are mostly new listings, which churn most
+YOUNG_SHARE = 0.5
+# Default home for refreshed snapshots and diffs, kept out of the region folders that merges glob
+REFRESH_DIR = 'refreshed'
+DIFF_COLUMNS = ['Change', 'Place ID', 'Business Name', 'Type', 'Latitude', 'Longitude', 'Status Before', 'Status After',
+                'Moved m', 'Rating Before', 'Rating After', 'Rating Delta', 'User Ratings Before', 'User Ratings After',
+                'User Ratings Delta']
+
+def load_snapshot(path):
+    """Previous output for a region (e.g. Lahore/DHA.csv) with scrapper column names, one row per Place ID."""
+    snapshot = read_normalised(path)
+    snapshot = snapshot[snapshot['Place ID'] != ''].drop_duplicates('Place ID')
+    return snapshot.reset_index(drop=True)
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+def _is_closed(status):
+    return str(status).startswith('CLOSED')
+
+def _covering(units, snapshot, project):
+    """Row positions in snapshot of the places each (grid_index, point, search_index, place_type, radius) unit covers.
+
+    Rows without a Type are covered by every type's search; plan_refresh weighs them accordingly.
+    """
+    covered = [np.array([], dtype=int)] * len(units)
+    located = snapshot[['Latitude', 'Longitude']].apply(pd.to_numeric, errors='coerce').notna().all(axis=1)
+    types = snapshot['Type'].astype(str) if 'Type' in snapshot.columns else pd.Series('', index=snapshot.index)
+    for place_type in dict.fromkeys(unit[3] for unit in units):
+        rows = np.flatnonzero(located & ((types == place_type) | (types == '')))
+        members = [u for u, unit in enumerate(units) if unit[3] == place_type]
+        if not len(rows) or not members:
+            continue
+        tree = STRtree(project(pd.to_numeric(snapshot['Latitude'].iloc[rows]),
+                               pd.to_numeric(snapshot['Longitude'].iloc[rows])))
+        centres = project([units[u][1][0] for u in members], [units[u][1][1] for u in members])
+        for radius in dict.fromkeys(units[u][4] for u in members):
+            batch = [i for i, u in enumerate(members) if units[u][4] == radius]
+            for i, hits in zip(batch, within_distance(tree, centres[batch], radius)):
+                covered[members[i]] = rows[hits]
+    return covered
+
+def plan_refresh(schedule, snapshot, audit_share=0.1, audit_seed=None, young_share=YOUNG_SHARE):
+    """Split a build_search_plan schedule into the searches worth repeating and the ones to trust.
+
+    A search is repeated when the snapshot suggests its circle has changed or hides places: it was
+    saturated (a full page means more places than one query shows; places without a Type count
+    1/n towards each of the n searched types), it holds closed places, most of its places have no
+    reviews yet (recent listings, only judged when the snapshot has User Ratings), or a rotating
+    audit_share sample of the stable ones picks it. The sample is drawn per audit_seed (default:
+    today's date), so periodic refreshes revisit every cell. Searches whose circle held nothing are
+    left to coarse sentinel searches.
+
+    Returns (refresh, empty, reasons) where refresh and empty list (grid_index, point, search_index,
+    place_type, radius) units and reasons counts why each refreshed search was picked.
+    """
+    units = [(grid_index, point, search_index, place_type, radius)
+             for grid_index, point, searches in schedule
+             for search_index, place_type, radius in searches]
+    if not units:
+        return [], [], {}
+    if audit_seed is None:
+        audit_seed = datetime.date.today().toordinal()
+
+    project = local_projector(np.mean([point[0] for _, point, _, _, _ in units]))
+    covered = _covering(units, snapshot, project)
+    # A place without a Type is shared out across the searched types instead of filling each one's page
+    untyped = (snapshot['Type'].astype(str) == '').to_numpy() if 'Type' in snapshot.columns \
+        else np.ones(len(snapshot), dtype=bool)
+    weights = np.where(untyped, 1.0 / len(dict.fromkeys(unit[3] for unit in units)), 1.0)
+    closed = snapshot['Status'].map(_is_closed).to_numpy() if 'Status' in snapshot.columns \
+        else np.zeros(len(snapshot), dtype=bool)
+    # Without review counts there is no telling new listings apart, so the young rule is skipped
+    unrated = ~(snapshot['User Ratings'].map(_number).to_numpy() > 0) if 'User Ratings' in snapshot.columns \
+        else None
+
+    refresh, empty = [], []
+    reasons = {'saturated': 0, 'closed': 0, 'young': 0, 'audit': 0}
+    for unit, rows in zip(units, covered):
+        if weights[rows].sum() >= MAX_RESULTS_PER_QUERY:
+            reason = 'saturated'
+        elif closed[rows].any():
+            reason = 'closed'
+        elif unrated is not None and len(rows) and unrated[rows].mean() >= young_share:
+            reason = 'young'
+        elif not len(rows):
+            empty.append(unit)
+            continue
+        elif zlib.crc32(f"{audit_seed}:{unit[3]}:{unit[1][0]:.6f},{unit[1][1]:.6f}".encode()) / 2 ** 32 < audit_share:
+            reason = 'audit'
+        else:
+            continue
+        reasons[reason] += 1
+        refresh.append(unit)
+    return refresh, empty, reasons
+
+def diff_snapshot(snapshot, records, missing_ids=(), move_threshold=25.0):
+    """Compare refreshed place records with the snapshot.
+
+    Returns (diff, refreshed): diff has one row per changed place listing its changes ('new', 'closed',
+    'reopened', 'status', 'moved', 'renamed', 'rating' and 'missing', comma-joined), and refreshed is the
+    snapshot with changed rows updated and new places appended. Missing places are only flagged in
+    the diff and, like rows that did not change, carried over as they were.
+    """
+    previous = snapshot.set_index('Place ID', drop=False)
+    rows = previous.to_dict('index')
+    columns = list(snapshot.columns)
+    diff = []
+
+    for record in records:
+        place_id = record['Place ID']
+        before = rows.get(place_id)
+        if before is None:
+            rows[place_id] = dict(record)
+            diff.append({'Change': 'new', **_diff_fields(None, record)})
+            continue
+
+        changes = []
+        status_before, status_after = before.get('Status', ''), record.get('Status', '')
+        if status_before and status_after != status_before:
+            if _is_closed(status_after) and not _is_closed(status_before):
+                changes.append('closed')
+            elif _is_closed(status_before) and not _is_closed(status_after):
+                changes.append('reopened')
+            else:
+                changes.append('status')
+        moved = haversine_distance(_number(before.get('Latitude')), _number(before.get('Longitude')),
+                                   record['Latitude'], record['Longitude'])
+        if moved > move_threshold:
+            changes.append('moved')
+        if before.get('Business Name') and record.get('Business Name') != before['Business Name']:
+            changes.append('renamed')
+        fields = _diff_fields(before, record)
+        if fields['Rating Delta'] not in (0, '') or fields['User Ratings Delta'] not in (0, ''):
+            changes.append('rating')
+        if not changes:
+            continue
+
+        updated = dict(before)
+        for column, value in record.items():
+            # A place keeps the type it was first filed under
+            if column == 'Type' and before.get('Type'):
+                continue
+            updated[column] = value
+        rows[place_id] = updated
+        diff.append({'Change': ','.join(changes), **fields,
+                     'Moved m': round(moved, 1) if moved > move_threshold else ''})
+
+    for place_id in missing_ids:
+        before = rows.get(place_id)
+        if before is not None:
+            diff.append({'Change': 'missing', **_diff_fields(before, None)})
+
+    for row in rows.values():
+        columns.extend(column for column in row if column not in columns)
+    refreshed = pd.DataFrame(list(rows.values()), columns=columns).fillna('')
+    return pd.DataFrame(diff, columns=DIFF_COLUMNS).fillna(''), refreshed
+
+def _diff_fields(before, after):
+    current = after if after is not None else before
+    fields = {
+        'Place ID': current['Place ID'],
+        'Business Name': current.get('Business Name', ''),
+        'Type': (before or {}).get('Type') or current.get('Type', ''),
+        'Latitude': current.get('Latitude', ''),
+        'Longitude': current.get('Longitude', ''),
+        'Status Before': (before or {}).get('Status', ''),
+        'Status After': (after or {}).get('Status', ''),
+        'Moved m': '',
+    }
+    for column, label in (('Rating', 'Rating'), ('User Ratings', 'User Ratings')):
+        value_before = _number((before or {}).get(column))
+        value_after = _number((after or {}).get(column))
+        fields[f'{label} Before'] = '' if np.isnan(value_before) else value_before
+        fields[f'{label} After'] = '' if np.isnan(value_after) else value_after
+        fields[f'{label} Delta'] = '' if np.isnan(value_before) or np.isnan(value_after) \
+            else round(value_after - value_before, 2)
+    return fields
+
+def refresh_region(api_key, shapefile_path, snapshot_file, output_file=None, diff_file=None, log_file='api_calls.log',
+                   max_workers=DEFAULT_MAX_WORKERS, planner='square', audit_share=0.1, audit_seed=None,
+                   move_threshold=25.0, region_cache=None):
+    """Re-scrape a region from its previous snapshot, querying only where change is likely.
+
+    Searches are picked by plan_refresh; searches over empty circles are checked with coarse sentinels
+    (see scrapper.run_sentinel_searches) and restored where those find anything. A place from the
+    snapshot that a repeated, unsaturated search of its own type should have returned but did not is
+    reported as missing in the diff but kept. A RegionCache skips re-reading and re-planning a known
+    region. The refreshed snapshot goes to output_file and the diff to diff_file, by default
+    refreshed/<folder>/<name>.csv and <name>_diff.csv for a snapshot <folder>/<name>.csv, so region
+    folders only ever hold scrapes. Returns the diff as a DataFrame whose attrs count the planned,
+    picked, sentinel, restored and failed searches.
+    """
+    folder = os.path.basename(os.path.dirname(os.path.abspath(snapshot_file)))
+    stem = os.path.splitext(os.path.basename(snapshot_file))[0]
+    if output_file is None:
+        output_file = os.path.join(REFRESH_DIR, folder, stem + '.csv')
+    if diff_file is None:
+        diff_file = os.path.join(REFRESH_DIR, folder, stem + '_diff.csv')
+    for path in (output_file, diff_file):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    digest, polygon, brick_index = load_region(shapefile_path, region_cache)
+    snapshot = load_snapshot(snapshot_file)
+    print(f"Loaded {len(snapshot)} places from {snapshot_file}")
+
+    if region_cache is None:
+        schedule = build_search_plan(polygon, SEARCH_TYPES, planner, verbose=False)
+    else:
+        schedule = cached_search_plan(polygon, SEARCH_TYPES, planner, region_cache, digest)
+    planned = sum(len(searches) for _, _, searches in schedule)
+    units, empty, reasons = plan_refresh(schedule, snapshot, audit_share, audit_seed)
+
+    processed_ids = set()
+    all_places = []
+    failed = 0
+    scrapper.rate_controller = AIMDController(initial=max(1, max_workers // 2), maximum=max_workers)
+    with create_session(max_workers) as session, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        sentinel_calls = 0
+        if empty:
+            restored, sentinel_calls = run_sentinel_searches(api_key, polygon, brick_index, empty, executor, session,
+                                                             log_file, processed_ids, all_places)
+            units = units + restored
+        picked = ', '.join(f'{count} {reason}' for reason, count in reasons.items())
+        print(f"Refresh: {len(units)} of {planned} planned searches ({picked}, "
+              f"{len(units) - sum(reasons.values())} restored by {sentinel_calls} sentinels)")
+
+        futures = [submit_search(executor, None, grid_index, search_index, api_key, point, radius, place_type,
+                                 grid_index, search_index, log_file, session)
+                   for grid_index, point, search_index, place_type, radius in units]
+        # Searches that returned a partial page saw everything of their type inside their circle
+        complete = []
+        for unit, future in zip(units, futures):
+            try:
+                places = future.result()
+            except PlacesFetchError as e:
+                print(f"Search failed at {unit[1]}: {e}")
+                failed += 1
+                continue
+            collect_places(places, unit[3], brick_index.region, brick_index, processed_ids, all_places)
+            if len(places) < MAX_RESULTS_PER_QUERY:
+                complete.append(unit)
+
+    # Only typed rows can be missed by a search of one type
+    missing_ids = []
+    if complete and 'Type' in snapshot.columns:
+        typed = snapshot[snapshot['Type'] != '']
+        project = local_projector(np.mean([point[0] for _, point, _, _, _ in complete]))
+        checked = set()
+        for rows in _covering(complete, typed.reset_index(drop=True), project):
+            checked.update(rows.tolist())
+        missing_ids = [place_id for place_id in typed['Place ID'].iloc[sorted(checked)]
+                       if place_id not in processed_ids]
+
+    diff, refreshed = diff_snapshot(snapshot, all_places, missing_ids, move_threshold)
+    refreshed.to_csv(output_file + '.tmp', index=False, encoding='utf-8')
+    os.replace(output_file + '.tmp', output_file)
+    diff.to_csv(diff_file, index=False, encoding='utf-8')
+    flush_all()
+
+    diff.attrs = {'planned': planned, 'picked': sum(reasons.values()), 'sentinels': sentinel_calls,
+                  'restored': len(units) - sum(reasons.values()), 'failed': failed}
+    counts = {}
+    for changes in diff['Change']:
+        for change in changes.split(','):
+            counts[change] = counts.get(change, 0) + 1
+    print("Changes: " + (", ".join(f"{count} {change}" for change, count in sorted(counts.items())) or "none"))
+    if failed:
+        print(f"{failed} searches failed after retries; their places were carried over unchecked")
+    print(f"Refreshed snapshot ({len(refreshed)} places) saved to {output_file}, diff to {diff_file}")
+    return diff
+
+# Usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh a region's previous scrape and report what changed.")
+    parser.add_argument("shapefile_path", help="region shapefile, e.g. lahoreShp/DHA/DHA.shp")
+    parser.add_argument("snapshot", help="previous output for the region, e.g. Lahore/DHA.csv")
+    parser.add_argument("--output", help="refreshed snapshot (default: refreshed/<folder>/<name>.csv)")
+    parser.add_argument("--diff", help="diff CSV (default: refreshed/<folder>/<name>_diff.csv)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS)
+    parser.add_argument("--planner", choices=["square", "hex"], default="square")
+    parser.add_argument("--audit-share", type=float, default=0.1, help="share of stable searches re-checked per run")
+    parser.add_argument("--audit-seed", type=int, help="picks the audit sample (default: today's date)")
+    parser.add_argument("--move-threshold", type=float, default=25.0, help="metres before a place counts as moved")
+    args = parser.parse_args()
+
+    refresh_region(os.getenv("GOOGLE_PLACES_API_KEY"), args.shapefile_path, args.snapshot, args.output, args.diff,
+                   max_workers=args.workers, planner=args.planner, audit_share=args.audit_share,
+                   audit_seed=args.audit_seed, move_threshold=args.move_threshold, region_cache=region_cache_from_env())
@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import shapely
+
+# Bump when the planners change so cached plans are rebuilt
+CACHE_VERSION = 1
+# Files that together define a shapefile's features and CRS
+SIDECARS = ('.shp', '.shx', '.dbf', '.prj', '.cpg')
+
+def region_digest(path, block_size=1 << 20):
+    """sha256 of a region file and, for a shapefile, of the sidecar files next to it."""
+    stem, extension = os.path.splitext(path)
+    paths = [stem + sidecar for sidecar in SIDECARS if os.path.exists(stem + sidecar)] \
+        if extension.lower() == '.shp' else [path]
+    digest = hashlib.sha256()
+    for part in paths:
+        digest.update(os.path.splitext(part)[1].lower().encode())
+        with open(part, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+def _pack_wkb(geoms):
+    # One byte buffer plus offsets keeps the arrays pickle-free
+    blobs = shapely.to_wkb(np.asarray(geoms, dtype=object)).tolist()
+    offsets = np.cumsum([0] + [len(blob) for blob in blobs], dtype=np.int64)
+    return np.frombuffer(b''.join(blobs), dtype=np.uint8), offsets
+
+def _unpack_wkb(data, offsets):
+    raw = data.tobytes()
+    return shapely.from_wkb([raw[start:end] for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())])
+
+class RegionCache:
+    """Region layers and search plans stored as .npz files keyed by the region file's content hash.
+
+    A layer entry holds the unioned region polygon and the brick geometries (as WKB) with their
+    names, so a known region loads without geopandas, reprojection or a fresh union. Plan entries
+    hold build_search_plan schedules per search types and planner. Editing the region file changes
+    its hash, so stale entries are simply never read again.
+
+    Args:
+        cache_dir (str): Directory for the entries, created on first write.
+    """
+
+    def __init__(self, cache_dir='.region-cache'):
+        self.cache_dir = cache_dir
+
+    def _path(self, name):
+        return os.path.join(self.cache_dir, f"{name}.npz")
+
+    def _load(self, name):
+        path = self._path(name)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as entry:
+                return {key: entry[key] for key in entry.files}
+        except (OSError, ValueError):
+            # A damaged entry is rebuilt like a missing one
+            return None
+
+    def _save(self, name, **arrays):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(name)
+        with open(path + '.tmp', 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(path + '.tmp', path)
+
+    def load_layer(self, digest):
+        """(polygon, bricks, names) for a region digest, or None if it is not cached."""
+        entry = self._load(digest)
+        if entry is None:
+            return None
+        polygon = shapely.from_wkb(entry['polygon'].tobytes())
+        bricks = _unpack_wkb(entry['bricks'], entry['brick_offsets'])
+        names = [name if has_name else None for name, has_name in zip(entry['names'].tolist(), entry['has_name'].tolist())]
+        return polygon, bricks, names
+
+    def save_layer(self, digest, polygon, bricks, names):
+        data, offsets = _pack_wkb(bricks)
+        has_name = [isinstance(name, str) for name in names]
+        self._save(digest,
+                   polygon=np.frombuffer(shapely.to_wkb(polygon), dtype=np.uint8),
+                   bricks=data, brick_offsets=offsets,
+                   names=np.array([name if ok else '' for name, ok in zip(names, has_name)], dtype=str),
+                   has_name=np.array(has_name, dtype=bool))
+
+    @staticmethod
+    def _plan_name(digest, search_types, planner):
+        settings = json.dumps([CACHE_VERSION, [list(search_type) for search_type in search_types], planner])
+        return f"{digest}-plan-{hashlib.sha256(settings.encode()).hexdigest()[:16]}"
+
+    def load_plan(self, digest, search_types, planner):
+        """A cached build_search_plan schedule, or None."""
+        entry = self._load(self._plan_name(digest, search_types, planner))
+        if entry is None:
+            return None
+        schedule = []
+        for grid_index, lat, lon, search_index, place_type, radius in zip(
+                entry['grid'].tolist(), entry['lat'].tolist(), entry['lon'].tolist(), entry['search'].tolist(),
+                entry['type'].tolist(), entry['radius'].tolist()):
+            if not schedule or schedule[-1][0] != grid_index:
+                schedule.append((grid_index, (lat, lon), []))
+            schedule[-1][2].append((search_index, place_type, radius))
+        return schedule
+
+    def save_plan(self, digest, search_types, planner, schedule):
+        units = [(grid_index, point, search)
+                 for grid_index, point, searches in schedule for search in searches]
+        self._save(self._plan_name(digest, search_types, planner),
+                   grid=np.array([grid_index for grid_index, _, _ in units], dtype=np.int64),
+                   lat=np.array([point[0] for _, point, _ in units], dtype=float),
+                   lon=np.array([point[1] for _, point, _ in units], dtype=float),
+                   search=np.array([search[0] for _, _, search in units], dtype=np.int64),
+                   type=np.array([search[1] for _, _, search in units], dtype=str),
+                   radius=np.array([search[2] for _, _, search in units], dtype=np.int64))
+
+def region_cache_from_env(cache_dir='.region-cache'):
+    """RegionCache in REGION_CACHE_DIR (default .region-cache), or None when REGION_CACHE_DISABLED=1."""
+    if os.getenv("REGION_CACHE_DISABLED") == "1":
+        return None
+    return RegionCache(os.getenv("REGION_CACHE_DIR", cache_dir))
@@ -0,0 +1,110 @@
+import argparse
+import time
+from math import cos, radians
+
+import numpy as np
+import shapely
+
+# Metres per degree of latitude (and of longitude at the equator)
+METRES_PER_DEGREE = 111320
+
+def vertex_count(geom):
+    return int(shapely.get_num_coordinates(geom))
+
+def _metre_factors(lat0):
+    # Local equirectangular metres around lat0, accurate enough for city-sized regions
+    return np.array([METRES_PER_DEGREE * cos(radians(lat0)), METRES_PER_DEGREE])
+
+def local_projector(lat0):
+    """Function mapping (lats, lngs) to shapely points in local equirectangular metres around latitude lat0."""
+    factors = _metre_factors(lat0)
+
+    def project(lats, lngs):
+        return shapely.points(np.asarray(lngs, dtype=float) * factors[0], np.asarray(lats, dtype=float) * factors[1])
+    return project
+
+def within_distance(tree, centres, distance):
+    """For each centre, the indices of the STRtree geometries within distance of it (one array per centre)."""
+    centres_idx, hits = tree.query(centres, predicate='dwithin', distance=distance)
+    return np.split(hits, np.searchsorted(centres_idx, np.arange(1, len(centres))))
+
+def working_geometry(polygon, tolerance=25.0, edge_buffer=None):
+    """Simplified stand-in for a region polygon that still covers all of it.
+
+    The polygon is simplified with a topology-preserving Douglas-Peucker pass (tolerance in metres,
+    so rings never self-intersect or collapse) and then grown by edge_buffer metres (default: the
+    tolerance) with mitred corners, which add no vertices. If the simplified outline cut inside the
+    original anywhere the buffer is doubled until the original is covered, so no business at the
+    edges is lost; at worst the result is only a little wider than asked.
+    """
+    edge_buffer = tolerance if edge_buffer is None else edge_buffer
+    factors = _metre_factors(polygon.centroid.y)
+    simplified = shapely.simplify(shapely.transform(polygon, lambda xy: xy * factors), tolerance, preserve_topology=True)
+    for _ in range(5):
+        working = shapely.transform(shapely.buffer(simplified, edge_buffer, join_style='mitre', mitre_limit=2.0),
+                                    lambda xy: xy / factors)
+        if working.covers(polygon):
+            return working
+        edge_buffer *= 2
+    # Should not happen for a buffer of several tolerances; fall back to exactness
+    return shapely.union(working, polygon)
+
+def _time(fn, repeats=3):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def simplification_report(original, working, samples=50000, circles=300, radius=1000, seed=0):
+    """Vertex reduction, area added by the buffer and timings of the containment-heavy stages.
+
+    contains_s times a vectorized contains_xy over `samples` random points in the region's bounds, as
+    planning and result filtering do; difference_s times subtracting the union of `circles` random
+    search circles, as validate_coverage does. Timings are the best of three runs.
+    """
+    rng = np.random.default_rng(seed)
+    minx, miny, maxx, maxy = working.bounds
+    xs, ys = rng.uniform(minx, maxx, samples), rng.uniform(miny, maxy, samples)
+    coverage = shapely.union_all(shapely.buffer(
+        shapely.points(rng.uniform(minx, maxx, circles), rng.uniform(miny, maxy, circles)), radius / METRES_PER_DEGREE))
+
+    report = {
+        'vertices_before': vertex_count(original),
+        'vertices_after': vertex_count(working),
+        'area_added': working.area / original.area - 1 if original.area else 0.0,
+    }
+    for label, geom in (('before', original), ('after', working)):
+        prepared = shapely.from_wkb(shapely.to_wkb(geom))
+        shapely.prepare(prepared)
+        report[f'contains_s_{label}'] = _time(lambda: shapely.contains_xy(prepared, xs, ys))
+        report[f'difference_s_{label}'] = _time(lambda: geom.difference(coverage))
+    report['vertex_reduction'] = 1 - report['vertices_after'] / report['vertices_before'] if report['vertices_before'] else 0.0
+    report['contains_speedup'] = report['contains_s_before'] / report['contains_s_after']
+    report['difference_speedup'] = report['difference_s_before'] / report['difference_s_after']
+    return report
+
+def print_report(name, report):
+    print(f"{name}: {report['vertices_before']} -> {report['vertices_after']} vertices "
+          f"({report['vertex_reduction']:.0%} fewer, {report['area_added']:.2%} area added); "
+          f"contains {report['contains_speedup']:.1f}x, difference {report['difference_speedup']:.1f}x faster")
+
+# Usage
+if __name__ == "__main__":
+    from scrapper import load_region_layer
+
+    parser = argparse.ArgumentParser(description="Report what simplifying region polygons saves.")
+    parser.add_argument("regions", nargs="+", help="region shapefiles or KMLs")
+    parser.add_argument("--tolerance", type=float, default=25.0, help="simplification tolerance in metres")
+    parser.add_argument("--edge-buffer", type=float, help="outer buffer in metres (default: the tolerance)")
+    args = parser.parse_args()
+
+    for path in args.regions:
+        try:
+            polygon = load_region_layer(path).geometry.union_all()
+        except ValueError as e:
+            # Point or line layers have no area to simplify
+            print(f"Skipping {path}: {e}")
+            continue
+        print_report(path, simplification_report(polygon, working_geometry(polygon, args.tolerance, args.edge_buffer)))
@@ -0,0 +1,136 @@
+import csv
+import os
+import shutil
+
+# Output columns in the order scrape_medical_businesses has always written them
+FIELDNAMES = ['Place ID', 'Brick Name', 'Business Name', 'Latitude', 'Longitude', 'Type', 'Status', 'Address',
+              'Rating', 'User Ratings']
+
+class CSVSink:
+    """Writes place records to a CSV file in batches as they arrive.
+
+    Records are buffered and appended every batch_size rows, so memory stays flat and the file
+    on disk always holds every flushed row under a complete header.
+    """
+
+    def __init__(self, path, batch_size=500, fieldnames=FIELDNAMES):
+        self.path = path
+        self.batch_size = batch_size
+        self.fieldnames = fieldnames
+        self.count = 0
+        self._buffer = []
+        self._file = open(path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=fieldnames, extrasaction='ignore', lineterminator='\n')
+        self._writer.writeheader()
+        self._file.flush()
+
+    def append(self, record):
+        self._buffer.append(record)
+        self.count += 1
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._writer.writerows(self._buffer)
+            self._buffer = []
+        self._file.flush()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+    def __len__(self):
+        return self.count
+
+class ParquetSink:
+    """Writes place records to a Parquet dataset partitioned by city and type (city=<city>/type=<type>/).
+
+    Each flush writes one part file per type with typed columns, so partial results can be read with
+    pandas.read_parquet or pyarrow.dataset while the scrape is still running. The city's partition is
+    replaced when the sink is opened.
+    """
+
+    def __init__(self, root, city, batch_size=5000):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet output needs pyarrow: pip install pyarrow") from e
+        self._pa = pa
+        self._pq = pq
+        self.schema = pa.schema([
+            ('Place ID', pa.string()),
+            ('Brick Name', pa.string()),
+            ('Business Name', pa.string()),
+            ('Latitude', pa.float64()),
+            ('Longitude', pa.float64()),
+            ('Status', pa.string()),
+            ('Address', pa.string()),
+            ('Rating', pa.float64()),
+            ('User Ratings', pa.int64()),
+        ])
+        self.root = root
+        self.city = city
+        self.batch_size = batch_size
+        self.count = 0
+        self._buffer = []
+        self._parts = 0
+
+        city_dir = os.path.join(root, f"city={city}")
+        if os.path.isdir(city_dir):
+            shutil.rmtree(city_dir)
+        os.makedirs(city_dir, exist_ok=True)
+
+    def append(self, record):
+        self._buffer.append(record)
+        self.count += 1
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    @staticmethod
+    def _number(value):
+        # The API omits ratings for unrated places; the CSV writes those as 'N/A'
+        return value if isinstance(value, (int, float)) else None
+
+    def flush(self):
+        if not self._buffer:
+            return
+        by_type = {}
+        for record in self._buffer:
+            by_type.setdefault(record.get('Type') or 'unknown', []).append(record)
+
+        for place_type, records in by_type.items():
+            columns = {
+                'Place ID': [r.get('Place ID') for r in records],
+                'Brick Name': [r.get('Brick Name') for r in records],
+                'Business Name': [r.get('Business Name') for r in records],
+                'Latitude': [r.get('Latitude') for r in records],
+                'Longitude': [r.get('Longitude') for r in records],
+                'Status': [r.get('Status') for r in records],
+                'Address': [r.get('Address') for r in records],
+                'Rating': [self._number(r.get('Rating')) for r in records],
+                'User Ratings': [self._number(r.get('User Ratings')) for r in records],
+            }
+            table = self._pa.table(columns, schema=self.schema)
+            part_dir = os.path.join(self.root, f"city={self.city}", f"type={place_type}")
+            os.makedirs(part_dir, exist_ok=True)
+            # Write to a temporary name and rename so readers never see a half-written part
+            final_path = os.path.join(part_dir, f"part-{self._parts:05d}.parquet")
+            temp_path = os.path.join(part_dir, f".part-{self._parts:05d}.parquet.tmp")
+            self._pq.write_table(table, temp_path)
+            os.replace(temp_path, final_path)
+        self._parts += 1
+        self._buffer = []
+
+    def close(self):
+        self.flush()
+
+    def __len__(self):
+        return self.count
+
+def open_sink(output_file, city=None, batch_size=None):
+    """Open a CSVSink for *.csv paths, otherwise a ParquetSink rooted at output_file (e.g. 'results.parquet/')."""
+    if output_file.lower().endswith('.csv'):
+        return CSVSink(output_file, batch_size=batch_size or 500)
+    return ParquetSink(output_file, city or 'unknown', batch_size=batch_size or 5000)
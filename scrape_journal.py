@@ -0,0 +1,110 @@
+import json
+import os
+from concurrent.futures import Future
+
+class ScrapeJournal:
+    """Append-only JSONL journal of completed search units and their raw results.
+
+    The first line records the run settings; each following line is one finished
+    (grid index, search index) unit. Resuming replays the recorded results, which
+    rebuilds the place_id dedup state, and only the remaining units are fetched. A unit
+    is only replayed when it is asked for at the journaled location and radius (a
+    sentinel's bucket can be re-centred by a changed plan); otherwise it is fetched
+    again and its new result supersedes the old line.
+
+    Args:
+        path (str): Journal file, usually next to the output CSV.
+        settings (dict): Run settings that must match when resuming (region, planner, search types...).
+        resume (bool): If True, load an existing journal; otherwise start a new one.
+    """
+
+    def __init__(self, path, settings, resume=False):
+        self.path = path
+        self.settings = settings
+        self.completed = {}
+        self.failed = set()
+
+        if resume and os.path.exists(path):
+            self._load()
+            self._file = open(path, 'a', encoding='utf-8')
+        else:
+            self._file = open(path, 'w', encoding='utf-8')
+            self._write({'settings': settings})
+
+    def _load(self):
+        with open(self.path, encoding='utf-8') as f:
+            for line_number, line in enumerate(f):
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash can leave a truncated last line; that unit is simply fetched again
+                    continue
+                if line_number == 0:
+                    if entry.get('settings') != self.settings:
+                        raise ValueError(f"Journal {self.path} was written with different settings; "
+                                         f"remove it or run without resume")
+                    continue
+                # A later line for the same unit supersedes an earlier one
+                self.completed[self.unit_key(entry['grid'], entry['search'])] = entry
+        print(f"Resuming from {self.path}: {len(self.completed)} completed searches")
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry) + '\n')
+        # Flush every line so an interrupted run keeps everything it has paid for
+        self._file.flush()
+
+    @staticmethod
+    def unit_key(grid_index, search_index):
+        return f"{grid_index}/{search_index}"
+
+    @staticmethod
+    def _same_query(entry, location, radius):
+        # Locations are compared at the 6-decimal precision of the api_calls.log lines
+        if location is None:
+            return True
+        return (entry.get('radius') == radius and entry.get('location') is not None
+                and all(round(a, 6) == round(b, 6) for a, b in zip(entry['location'], location)))
+
+    def is_done(self, grid_index, search_index, location=None, radius=None):
+        """Whether the unit is journaled (and, given location and radius, was queried with them)."""
+        entry = self.completed.get(self.unit_key(grid_index, search_index))
+        return entry is not None and self._same_query(entry, location, radius)
+
+    def results(self, grid_index, search_index):
+        return self.completed[self.unit_key(grid_index, search_index)]['results']
+
+    def record(self, grid_index, search_index, place_type, location, radius, results):
+        """Append a finished unit unless it was already journaled with the same location and radius."""
+        key = self.unit_key(grid_index, search_index)
+        if key in self.completed and self._same_query(self.completed[key], location, radius):
+            return
+        entry = {
+            'grid': grid_index,
+            'search': search_index,
+            'type': place_type,
+            'location': list(location),
+            'radius': radius,
+            'results': results,
+        }
+        self.completed[key] = entry
+        self._write(entry)
+
+    def fail(self, grid_index, search_index):
+        """Note a unit whose fetch failed; it is not journaled, so a resumed run fetches it again."""
+        self.failed.add(self.unit_key(grid_index, search_index))
+
+    def submit(self, executor, grid_index, search_index, fn, *args, location=None, radius=None):
+        """Submit fn(*args) to executor, or return an already-completed future for a journaled unit.
+
+        With location and radius, a unit journaled for a different query is fetched again.
+        """
+        if self.is_done(grid_index, search_index, location, radius):
+            future = Future()
+            future.set_result(self.results(grid_index, search_index))
+            return future
+        return executor.submit(fn, *args)
+
+    def close(self, remove=False):
+        self._file.close()
+        if remove and os.path.exists(self.path):
+            os.remove(self.path)
@@ -1,15 +1,27 @@
-import geopandas as gpd
-from shapely.geometry import Point, Polygon, MultiPolygon
-import pandas as pd
+import shapely
+from shapely.geometry import Polygon, MultiPolygon
+from shapely.strtree import STRtree
 import numpy as np
 import requests
 from dotenv import load_dotenv
 import os
 from math import radians, sin, cos, sqrt, atan2
-import matplotlib.pyplot as plt
-from shapely.ops import unary_union
-from itertools import product
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 import logging
+import time
+from places_cache import PlacesCache, cache_from_env
+from scrape_journal import ScrapeJournal
+from metrics import buffered_writer, events_for, flush_all, stages
+from yield_history import YieldHistory
+from result_sink import open_sink
+from rate_control import AIMDController, PlacesFetchError, RetryPolicy, classify_response
+from region_cache import region_cache_from_env, region_digest
+from region_geometry import vertex_count, working_geometry
+from collections import defaultdict
+from math import floor
+import argparse
 
 # Set up logging for API calls
 logging.basicConfig(filename='api_calls.log', level=logging.INFO, format='%(asctime)s - %(message)s')
@@ -24,9 +36,44 @@ search_parameter_counts = {
 
 grid_search_counts = {}
 
+# Number of concurrent Places API requests per scrape
+DEFAULT_MAX_WORKERS = 8
+
+# Nearby Search returns at most 20 results per page; a full page means the area is saturated
+MAX_RESULTS_PER_QUERY = 20
+
+# Search types and their radii in meters
+SEARCH_TYPES = [
+    ('hospital', 2000),
+    ('doctor', 1500),
+    ('pharmacy', 1000),
+    ('dentist', 1000)
+]
+
+# Optional limiter shared by every fetch in this process (set by batch_scrape for a global rate budget)
+rate_limiter = None
+
+# AIMD concurrency limit shared by every fetch in this process (set per scrape), and how failed requests are retried
+rate_controller = None
+retry_policy = RetryPolicy()
+
 # Load environment variables
 load_dotenv()
 
+def load_region_layer(path):
+    """Read a region shapefile or KML in EPSG:4326, keeping only its polygon features (the bricks)."""
+    import geopandas as gpd
+    gdf = gpd.read_file(path)
+    if gdf.crs != "EPSG:4326":
+        gdf = gdf.to_crs("EPSG:4326")
+    # KML exports often mix placemark points in with the boundary polygons
+    polygonal = gdf.geometry.geom_type.isin(['Polygon', 'MultiPolygon'])
+    if not polygonal.all():
+        gdf = gdf[polygonal].reset_index(drop=True)
+    if gdf.empty:
+        raise ValueError(f"No polygons found in {path}")
+    return gdf
+
 def haversine_distance(lat1, lon1, lat2, lon2):
     """Calculate the distance between two points on earth in meters."""
     R = 6371000  # Earth's radius in meters
@@ -37,32 +84,53 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     c = 2 * atan2(sqrt(a), sqrt(1-a))
     return R * c
 
-def create_coverage_circle(lat, lon, radius_meters):
-    """Create a circular polygon representing the coverage area of a search point."""
+def create_coverage_circle(lat, lon, radius_meters, metric=False):
+    """Create a circular polygon representing the coverage area of a search point.
+    
+    With metric=True the longitude radius is widened by 1/cos(lat) so the circle is round on the ground.
+    """
     # Convert radius from meters to degrees (approximate)
     radius_degrees = radius_meters / 111320
+    lon_radius_degrees = radius_degrees / cos(radians(lat)) if metric else radius_degrees
     
     # Create points for the circle
     angles = np.linspace(0, 360, 32)
     circle_points = []
     for angle in angles:
-        dx = radius_degrees * cos(radians(angle))
+        dx = lon_radius_degrees * cos(radians(angle))
         dy = radius_degrees * sin(radians(angle))
         circle_points.append((lon + dx, lat + dy))
     
     return Polygon(circle_points)
 
-def validate_coverage(points, search_radius, polygon):
+def coverage_circle_coords(points, radius_meters, metric=False):
+    """(lon, lat) outlines of the coverage circles of (lat, lon) points as an array of shape (n, 32, 2)."""
+    radius_degrees = radius_meters / 111320
+    angles = np.radians(np.linspace(0, 360, 32))
+    lats, lons = np.asarray(points, dtype=float).reshape(-1, 2).T
+    lon_radius_degrees = radius_degrees / np.cos(np.radians(lats)) if metric else np.full(len(lats), radius_degrees)
+    coords = np.empty((len(lats), len(angles), 2))
+    coords[:, :, 0] = lons[:, None] + lon_radius_degrees[:, None] * np.cos(angles)
+    coords[:, :, 1] = lats[:, None] + radius_degrees * np.sin(angles)
+    return coords
+
+def create_coverage_circles(points, radius_meters, metric=False):
+    """Vectorized create_coverage_circle for a list of (lat, lon) points; returns an array of polygons."""
+    if len(points) == 0:
+        return np.array([], dtype=object)
+    return shapely.polygons(coverage_circle_coords(points, radius_meters, metric))
+
+def validate_coverage(points, search_radius, polygon, metric=False):
     """Validate coverage and identify gaps in the search area."""
-    # Create coverage circles for all points
-    coverage_circles = [create_coverage_circle(lat, lon, search_radius) 
-                       for lat, lon in points]
-    
-    # Combine all coverage circles
-    total_coverage = unary_union(coverage_circles)
-    
-    # Find uncovered areas
-    uncovered = polygon.difference(total_coverage)
+    with stages.stage('coverage validation'):
+        # Create coverage circles for all points
+        coverage_circles = create_coverage_circles(points, search_radius, metric)
+        
+        # Combine all coverage circles
+        total_coverage = shapely.union_all(coverage_circles)
+        
+        # Find uncovered areas
+        uncovered = polygon.difference(total_coverage)
     
     return uncovered, total_coverage
 
@@ -77,11 +145,13 @@ def generate_optimized_grid(polygon, search_radius, overlap_factor=1.4):
     x_coords = np.arange(bounds[0], bounds[2], step)
     y_coords = np.arange(bounds[1], bounds[3], step)
     
-    points = []
-    for x, y in product(x_coords, y_coords):
-        point = Point(x, y)
-        if polygon.contains(point):
-            points.append((y, x))  # Convert to (lat, lon)
+    # Build the lattice as arrays (x-major, matching product(x_coords, y_coords)) and filter it
+    # with one vectorized containment test against the prepared polygon
+    xs, ys = np.meshgrid(x_coords, y_coords, indexing='ij')
+    xs, ys = xs.ravel(), ys.ravel()
+    shapely.prepare(polygon)
+    inside = shapely.contains_xy(polygon, xs, ys)
+    points = list(zip(ys[inside].tolist(), xs[inside].tolist()))  # Convert to (lat, lon)
     
     # Validate coverage and add additional points if needed
     uncovered, coverage = validate_coverage(points, search_radius, polygon)
@@ -98,34 +168,228 @@ def generate_optimized_grid(polygon, search_radius, overlap_factor=1.4):
     
     return points
 
-def visualize_coverage(polygon, points, search_radius, output_file='coverage_map.png'):
-    """Visualize the search coverage and any potential gaps."""
-    fig, ax = plt.subplots(figsize=(15, 15))
+# Hex cells are shrunk to this share of the search radius to absorb projection and polygonisation error
+HEX_COVERAGE_MARGIN = 0.99
+
+def generate_hex_grid(polygon, search_radius, coverage_margin=HEX_COVERAGE_MARGIN):
+    """Generate search points on a hexagonal lattice laid out in the region's local UTM zone.
+    
+    Circles on a triangular lattice with spacing sqrt(3) * r are the thinnest covering of the plane,
+    so every point of the polygon lies within search_radius of a centre. Lattice points are kept when
+    their hexagonal cell touches the polygon. coverage_margin shrinks the cell slightly to absorb UTM
+    scale error and the 32-sided circles used for validation.
+    """
+    import geopandas as gpd
+    region = gpd.GeoSeries([polygon], crs="EPSG:4326")
+    utm_crs = region.estimate_utm_crs()
+    projected = region.to_crs(utm_crs).iloc[0]
+    shapely.prepare(projected)
+    
+    r = search_radius * coverage_margin
+    dx = sqrt(3) * r
+    dy = 1.5 * r
+    minx, miny, maxx, maxy = projected.bounds
+    
+    # Pad the lattice by one cell so hexagons overlapping the border are candidates too
+    x_coords = np.arange(minx - dx, maxx + dx, dx)
+    y_coords = np.arange(miny - dy, maxy + dy, dy)
+    xs, ys = np.meshgrid(x_coords, y_coords)
+    xs = xs + (np.arange(len(y_coords)) % 2)[:, None] * (dx / 2)  # Offset every other row
+    xs, ys = xs.ravel(), ys.ravel()
+    
+    # Pointy-top hexagons with circumradius r: the Voronoi cell of each lattice point
+    angles = np.radians(np.arange(30, 390, 60))
+    coords = np.empty((len(xs), len(angles), 2))
+    coords[:, :, 0] = xs[:, None] + r * np.cos(angles)
+    coords[:, :, 1] = ys[:, None] + r * np.sin(angles)
+    keep = shapely.intersects(projected, shapely.polygons(coords))
+    
+    centres = gpd.GeoSeries(shapely.points(xs[keep], ys[keep]), crs=utm_crs).to_crs("EPSG:4326")
+    return list(zip(centres.y.tolist(), centres.x.tolist()))  # (lat, lon)
+
+def plan_grid(polygon, search_radius, planner='square'):
+    """Generate search points with the requested planner ('square' or 'hex')."""
+    if planner == 'hex':
+        return generate_hex_grid(polygon, search_radius)
+    if planner == 'square':
+        return generate_optimized_grid(polygon, search_radius)
+    raise ValueError(f"Unknown planner: {planner}")
+
+def compare_planners(polygon, search_types):
+    """Print square vs hexagonal point counts and the ground area each leaves uncovered."""
+    for place_type, radius in search_types:
+        square = generate_optimized_grid(polygon, radius)
+        hexagonal = generate_hex_grid(polygon, radius)
+        square_gaps, _ = validate_coverage(square, radius, polygon, metric=True)
+        hex_gaps, _ = validate_coverage(hexagonal, radius, polygon, metric=True)
+        saving = 1 - len(hexagonal) / len(square) if square else 0
+        print(f"{place_type} ({radius}m): square grid {len(square)} points, hex grid {len(hexagonal)} points "
+              f"({saving:.0%} fewer); uncovered area {square_gaps.area / polygon.area:.2%} vs {hex_gaps.area / polygon.area:.2%}")
+
+def subdivide_cell(lat, lon, radius, planner='square'):
+    """Split a search cell into children with half the radius that cover it.
+    
+    A square cell (the square inscribed in its circle) splits into four quadrants. A hex cell (the
+    pointy-top hexagon of generate_hex_grid, circumradius coverage_margin * radius) splits into the
+    seven hex cells of the twice-as-fine lattice centred on it, which cover the whole hexagon.
+    """
+    child_radius = radius / 2
+    metres_lon = 111320 * cos(radians(lat))
+    if planner == 'hex':
+        # Lattice neighbours of a pointy-top hexagon lie sqrt(3) circumradii away at 0, 60, ... 300 degrees
+        spacing = sqrt(3) * HEX_COVERAGE_MARGIN * child_radius
+        angles = np.radians(np.arange(0, 360, 60))
+        return [(lat, lon, child_radius)] + [
+            (lat + spacing * sin(angle) / 111320, lon + spacing * cos(angle) / metres_lon, child_radius)
+            for angle in angles.tolist()]
+    # A circle of radius r covers the square of half-side r/sqrt(2); each child covers one quadrant
+    offset = radius / (2 * sqrt(2))
+    dlat = offset / 111320
+    dlon = offset / metres_lon
+    return [
+        (lat + dlat, lon - dlon, child_radius),
+        (lat + dlat, lon + dlon, child_radius),
+        (lat - dlat, lon - dlon, child_radius),
+        (lat - dlat, lon + dlon, child_radius),
+    ]
+
+def adaptive_search(api_key, polygon, place_type, radius, executor, session=None, search_index=None,
+                    log_file='api_calls.log', coarse_factor=2, min_radius=250, cache=None, planner='square', journal=None):
+    """Search place_type with a quadtree that starts coarse and only refines where results saturate.
+    
+    The coarse lattice uses radius * coarse_factor. Cells that return a full page are split into children
+    with half the radius (down to min_radius; four for the square planner, seven for hex, see
+    subdivide_cell), cells that return nothing are pruned.
+    Yields (cell_id, (lat, lon), cell_radius, places, children) for every query in breadth-first order.
+    Cells already in the journal are replayed instead of fetched, so a resumed run retraces the same tree.
+    """
+    coarse_radius = radius * coarse_factor
+    level = [(str(i), lat, lon, coarse_radius)
+             for i, (lat, lon) in enumerate(plan_grid(polygon, coarse_radius, planner))]
+    
+    while level:
+        # Query a whole level concurrently, then consume it in order
+        futures = [submit_search(executor, journal, cell_id, search_index, api_key, (lat, lon), int(cell_radius),
+                                 place_type, cell_id, search_index, log_file, session, cache)
+                   for cell_id, lat, lon, cell_radius in level]
+        next_level = []
+        for (cell_id, lat, lon, cell_radius), future in zip(level, futures):
+            try:
+                places = future.result()
+            except PlacesFetchError:
+                # Not journaled, so --resume fetches the cell (and refines it) again
+                if journal is not None:
+                    journal.fail(cell_id, search_index)
+                continue
+            if journal is not None:
+                journal.record(cell_id, search_index, place_type, (lat, lon), int(cell_radius), places)
+            children = []
+            if len(places) >= MAX_RESULTS_PER_QUERY and cell_radius / 2 >= min_radius:
+                for child_index, (child_lat, child_lon, child_radius) in enumerate(subdivide_cell(lat, lon, cell_radius, planner)):
+                    # Drop children whose coverage circle falls entirely outside the region
+                    if polygon.intersects(create_coverage_circle(child_lat, child_lon, child_radius)):
+                        children.append((f"{cell_id}.{child_index}", child_lat, child_lon, child_radius))
+                next_level.extend(children)
+            yield cell_id, (lat, lon), cell_radius, places, len(children)
+        level = next_level
+
+def coverage_stats(polygon, points, search_radius, metric=False):
+    """Share of the region left uncovered and how much the circles overlap inside it.
+    
+    overlap_ratio is the summed circle area inside the region over the area they cover together,
+    so 1.0 means no overlap and 1.5 means half of the covered area is searched twice.
+    """
+    circles = create_coverage_circles(points, search_radius, metric)
+    inside = shapely.intersection(circles, polygon)
+    covered = shapely.union_all(inside)
+    return {
+        'uncovered_fraction': 1 - covered.area / polygon.area if polygon.area else 0.0,
+        'overlap_ratio': float(shapely.area(inside).sum() / covered.area) if covered.area else 0.0,
+    }
+
+def visualize_coverage(polygon, points, search_radius, output_file='coverage_map.png', metric=False):
+    """Visualize the search coverage and any potential gaps; returns coverage_stats for the points.
+    
+    Circles and markers are drawn as one collection each, on a standalone Figure so it can run off
+    the main thread.
+    """
+    # Only drawing needs matplotlib, so it is not paid for at startup
+    from matplotlib.collections import PolyCollection
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(15, 15))
+    ax = fig.add_subplot()
     
     # Plot the main polygon
-    if isinstance(polygon, MultiPolygon):
-        for geom in polygon.geoms:
-            x, y = geom.exterior.xy
-            ax.plot(x, y, 'k-', linewidth=2)
-    else:
-        x, y = polygon.exterior.xy
+    geoms = polygon.geoms if isinstance(polygon, MultiPolygon) else [polygon]
+    for geom in geoms:
+        x, y = geom.exterior.xy
         ax.plot(x, y, 'k-', linewidth=2)
     
-    # Plot coverage circles
-    for lat, lon in points:
-        circle = create_coverage_circle(lat, lon, search_radius)
-        x, y = circle.exterior.xy
-        ax.plot(x, y, 'b-', alpha=0.3)
-        ax.plot(lon, lat, 'r.', markersize=5)
+    # Plot coverage circles and their centres
+    if len(points):
+        ax.add_collection(PolyCollection(coverage_circle_coords(points, search_radius, metric), closed=False,
+                                         facecolors='none', edgecolors='b', alpha=0.3))
+        lats, lons = np.asarray(points, dtype=float).T
+        ax.plot(lons, lats, 'r.', markersize=5)
     
+    ax.autoscale_view()
     ax.set_aspect('equal')
-    plt.title('Search Coverage Map')
-    plt.savefig(output_file)
-    plt.close()
+    ax.set_title('Search Coverage Map')
+    fig.savefig(output_file)
+    return coverage_stats(polygon, points, search_radius, metric)
+
+def print_coverage_stats(stats):
+    print(f"Coverage: {stats['uncovered_fraction']:.2%} of the region uncovered, "
+          f"overlap ratio {stats['overlap_ratio']:.2f}")
 
-def fetch_places(api_key, location, radius=2000, place_type='hospital', grid_index=None, search_index=None, log_file='api_calls.log'):
-    """Fetch places from Google Places API and log the number of customers, hits per search, and hits per grid."""
-    base_url = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
+class CoverageMapJob:
+    """Runs visualize_coverage on a background thread so drawing never delays the first API calls."""
+    
+    def __init__(self, *args, **kwargs):
+        self.stats = None
+        self.error = None
+        self._thread = threading.Thread(target=self._run, args=args, kwargs=kwargs, daemon=True)
+        self._thread.start()
+    
+    def _run(self, *args, **kwargs):
+        try:
+            self.stats = visualize_coverage(*args, **kwargs)
+        except Exception as e:
+            self.error = e
+    
+    def result(self):
+        """Wait for the map and return its coverage stats (None if drawing failed)."""
+        self._thread.join()
+        if self.error is not None:
+            print(f"Coverage map failed: {self.error}")
+        return self.stats
+
+def submit_search(executor, journal, grid_index, search_index, *fetch_args):
+    """Submit fetch_places(*fetch_args), replaying the journaled result if this unit already finished."""
+    if journal is None:
+        return executor.submit(fetch_places, *fetch_args)
+    # fetch_args start with api_key, location, radius, as fetch_places takes them
+    _, location, radius = fetch_args[:3]
+    return journal.submit(executor, grid_index, search_index, fetch_places, *fetch_args,
+                          location=location, radius=radius)
+
+def create_session(max_workers=DEFAULT_MAX_WORKERS):
+    """Create a requests session whose keep-alive connection pool is sized for max_workers threads."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def fetch_places(api_key, location, radius=2000, place_type='hospital', grid_index=None, search_index=None, log_file='api_calls.log', session=None,
+                 cache=None):
+    """Fetch places from Google Places API and log the number of customers, hits per search, and hits per grid.
+    
+    When a PlacesCache is given, cached responses are served without a request; in replay-only mode a miss returns [].
+    Quota errors, 5xx answers and connection errors are retried with jittered exponential backoff (see
+    retry_policy) while rate_controller narrows concurrency; a search that still fails raises PlacesFetchError.
+    """
+    base_url = os.getenv("PLACES_API_URL", "https://maps.googleapis.com/maps/api/place/nearbysearch/json")
     
     # Optimize search parameters based on place type
     keyword_map = {
@@ -147,71 +411,386 @@ def fetch_places(api_key, location, radius=2000, place_type='hospital', grid_ind
         'language': 'en'
     }
     
-    try:
-        response = requests.get(base_url, params=params)
-        if response.status_code == 200:
-            data = response.json()
-            if data.get("status") != "OK" and data.get("status") != "ZERO_RESULTS":
-                print(f"API Error: {data.get('error_message', 'Unknown error')} (Status: {data.get('status')})")
+    events = events_for(log_file)
+    log = buffered_writer(log_file)
+    
+    cache_key = None
+    if cache is not None:
+        cache_key = PlacesCache.make_key(location, radius, place_type, params['keyword'], params['language'])
+        data = cache.get(cache_key)
+        if data is not None:
+            places = data.get("results", [])
+            log.write(f"Grid #{grid_index} | Search #{search_index} | Cache Hit: {place_type} at ({lat:.6f}, {lon:.6f}) - Found: {len(places)} customers\n")
+            events.record('request', grid=grid_index, search=search_index, place_type=place_type, location=[lat, lon],
+                          radius=radius, status=data.get("status"), cached=True, latency_ms=None, results=len(places),
+                          saturated=len(places) >= MAX_RESULTS_PER_QUERY)
+            return places
+        if cache.replay_only:
+            print(f"Cache miss in replay-only mode: {place_type} at ({lat:.6f}, {lon:.6f})")
+            events.record('request', grid=grid_index, search=search_index, place_type=place_type, location=[lat, lon],
+                          radius=radius, status='REPLAY_MISS', cached=True, latency_ms=None, results=0, saturated=False)
+            return []
+    
+    # Reuse pooled connections when a session is given
+    http = session if session is not None else requests
+    
+    for attempt in range(retry_policy.max_attempts):
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        if rate_controller is not None:
+            rate_controller.acquire()
+        
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            response = http.get(base_url, params=params)
+            latency_ms = round((time.perf_counter() - start) * 1000, 1)
+            data = response.json() if response.status_code == 200 else {}
+            status = data.get("status") if response.status_code == 200 else f"HTTP_{response.status_code}"
+            outcome = classify_response(response.status_code, data.get("status"))
+            error = data.get('error_message') or (response.text[:200] if response.status_code != 200 else None)
+        except Exception as e:
+            latency_ms = round((time.perf_counter() - start) * 1000, 1)
+            status, error = 'EXCEPTION', str(e)
+        finally:
+            if rate_controller is not None:
+                rate_controller.release(outcome)
+        
+        if outcome == 'ok':
+            if cache is not None:
+                # Only successful responses are cached so errors are retried on the next run
+                cache.put(cache_key, data)
             places = data.get("results", [])
             
             # Log the API hit for this search location, type, and the number of customers found
-            with open(log_file, 'a') as log:
-                # Log for API hits per grid (index-wise)
-                log.write(f"Grid #{grid_index} | Search #{search_index} | API Hit: {place_type} at ({lat:.6f}, {lon:.6f}) - Found: {len(places)} customers\n")
-            
+            log.write(f"Grid #{grid_index} | Search #{search_index} | API Hit: {place_type} at ({lat:.6f}, {lon:.6f}) - Found: {len(places)} customers\n")
+            events.record('request', grid=grid_index, search=search_index, place_type=place_type, location=[lat, lon],
+                          radius=radius, status=status, cached=False, latency_ms=latency_ms,
+                          results=len(places), saturated=len(places) >= MAX_RESULTS_PER_QUERY, attempt=attempt)
             return places
-        else:
-            print(f"API Request Failed: {response.status_code} - {response.text}")
-            return []
-    except Exception as e:
-        print(f"Error in API call: {e}")
-        return []
+        
+        events.record('request', grid=grid_index, search=search_index, place_type=place_type, location=[lat, lon],
+                      radius=radius, status=status, cached=False, latency_ms=latency_ms, results=0, saturated=False,
+                      attempt=attempt, error=error)
+        if not retry_policy.should_retry(outcome, attempt):
+            break
+        delay = retry_policy.delay(attempt)
+        print(f"API Error: {error} (Status: {status}) for {place_type} at ({lat:.6f}, {lon:.6f}); "
+              f"retry {attempt + 1} in {delay:.1f}s")
+        time.sleep(delay)
+    
+    print(f"API Error: {error} (Status: {status}) for {place_type} at ({lat:.6f}, {lon:.6f}); giving up")
+    raise PlacesFetchError(f"{place_type} at ({lat:.6f}, {lon:.6f}) failed after {attempt + 1} attempts: {status}")
 
-def scrape_medical_businesses(api_key, shapefile_path, output_file, log_file='api_calls.log'):
-    """Main function to scrape medical businesses and log API hits per search, grid, and customer count."""
-    # Load and process shapefile
-    gdf = gpd.read_file(shapefile_path)
-    if gdf.crs != "EPSG:4326":
-        gdf = gdf.to_crs("EPSG:4326")
+class BrickIndex:
+    """STRtree over the brick layer for vectorized 'Brick Name' lookup.
     
-    polygon = gdf.geometry.unary_union
-    print("Shapefile loaded. Generating optimized search points...")
+    region is the exact outline the bricks make up (their union unless given), prepared for filtering
+    results; it stays exact when planning runs on a simplified working geometry.
+    """
     
-    # Define search parameters
-    search_types = [
-        ('hospital', 2000),
-        ('doctor', 1500),
-        ('pharmacy', 1000),
-        ('dentist', 1000)
-    ]
+    def __init__(self, gdf, name_column='name', region=None):
+        names = gdf[name_column].tolist() if name_column in gdf.columns else ['Unknown'] * len(gdf)
+        self._build(np.asarray(gdf.geometry.values), names, region)
+    
+    @classmethod
+    def from_geometries(cls, geoms, names, region=None):
+        """Build the index from brick geometries and their names, e.g. as loaded from a RegionCache."""
+        index = cls.__new__(cls)
+        index._build(geoms, names, region)
+        return index
+    
+    def _build(self, geoms, names, region):
+        shapely.prepare(geoms)
+        self.geoms = geoms
+        self.tree = STRtree(geoms)
+        self.names = names
+        self._region = region
+        if region is not None:
+            shapely.prepare(region)
+    
+    @property
+    def region(self):
+        if self._region is None:
+            self._region = shapely.union_all(self.geoms)
+            shapely.prepare(self._region)
+        return self._region
+    
+    def lookup(self, lngs, lats):
+        """Return the brick name containing each (lng, lat) point, or 'Unknown'."""
+        points = shapely.points(lngs, lats)
+        point_idx, brick_idx = self.tree.query(points, predicate='within')
+        result = ['Unknown'] * len(points)
+        # Where bricks overlap, the first one in file order wins, as with the old row scan
+        first = {}
+        for p, b in zip(point_idx.tolist(), brick_idx.tolist()):
+            if p not in first or b < first[p]:
+                first[p] = b
+        for p, b in first.items():
+            result[p] = self.names[b]
+        return result
+
+def load_region(path, region_cache=None, simplify_tolerance=None, edge_buffer=None):
+    """Return (digest, polygon, brick_index) for a region file: the unioned, prepared polygon and its bricks.
     
-    # Generate optimized search points
-    all_points = []
+    With a RegionCache a region seen before is read from the cache instead of being parsed, reprojected
+    and unioned again; digest then identifies the working polygon (None without a cache).
+    With simplify_tolerance (metres) the polygon is replaced by working_geometry's simplified outline,
+    grown by edge_buffer (default: the tolerance) so it still covers the region. It is only used for
+    planning and coverage checks; results are filtered against brick_index.region, the exact outline.
+    """
+    digest = layer = None
+    if region_cache is not None:
+        digest = region_digest(path)
+        layer = region_cache.load_layer(digest)
+    if layer is None:
+        gdf = load_region_layer(path)
+        polygon = gdf.geometry.union_all()
+        brick_index = BrickIndex(gdf, region=polygon)
+        if region_cache is not None:
+            region_cache.save_layer(digest, polygon, brick_index.geoms, brick_index.names)
+    else:
+        polygon, bricks, names = layer
+        brick_index = BrickIndex.from_geometries(bricks, names, polygon)
+    if simplify_tolerance:
+        edge_buffer = simplify_tolerance if edge_buffer is None else edge_buffer
+        original = vertex_count(polygon)
+        polygon = working_geometry(polygon, simplify_tolerance, edge_buffer)
+        print(f"Working geometry: {original} -> {vertex_count(polygon)} vertices "
+              f"(tolerance {simplify_tolerance:g} m, edge buffer {edge_buffer:g} m)")
+        if digest is not None:
+            # Plans cached for the exact outline do not apply to the simplified one
+            digest = f"{digest}-simplified-{simplify_tolerance:g}-{edge_buffer:g}"
+    # Prepared geometries make the repeated containment checks much cheaper
+    shapely.prepare(polygon)
+    return digest, polygon, brick_index
+
+def cached_search_plan(polygon, search_types, planner='square', region_cache=None, digest=None):
+    """build_search_plan, served from the region cache when this region was planned the same way before."""
+    if region_cache is None:
+        return build_search_plan(polygon, search_types, planner)
+    schedule = region_cache.load_plan(digest, search_types, planner)
+    if schedule is not None:
+        print(f"Search plan loaded from region cache: {sum(len(searches) for _, _, searches in schedule)} API calls")
+        return schedule
+    schedule = build_search_plan(polygon, search_types, planner)
+    region_cache.save_plan(digest, search_types, planner, schedule)
+    return schedule
+
+def collect_places(places, place_type, polygon, brick_index, processed_ids, all_places):
+    """Append new places inside the polygon to all_places, deduplicating by place_id."""
+    new_places = []
+    for place in places:
+        place_id = place.get("place_id")
+        if place_id and place_id not in processed_ids:
+            processed_ids.add(place_id)
+            
+            location = place.get("geometry", {}).get("location", {})
+            lat = location.get("lat")
+            lng = location.get("lng")
+            if lat and lng:
+                new_places.append((place_id, place, lat, lng))
+    
+    if not new_places:
+        return
+    
+    # Filter the whole response against the region and look up bricks in one vectorized pass
+    lats = np.array([lat for _, _, lat, _ in new_places], dtype=float)
+    lngs = np.array([lng for _, _, _, lng in new_places], dtype=float)
+    inside = shapely.contains_xy(polygon, lngs, lats)
+    if not inside.any():
+        return
+    brick_names = brick_index.lookup(lngs[inside], lats[inside])
+    
+    kept = [entry for entry, keep in zip(new_places, inside) if keep]
+    for (place_id, place, lat, lng), brick_name in zip(kept, brick_names):
+        all_places.append({
+            'Place ID': place_id,
+            'Brick Name': brick_name,
+            'Business Name': place.get('name'),
+            'Latitude': lat,
+            'Longitude': lng,
+            'Type': place_type,
+            'Status': place.get('business_status', 'UNKNOWN'),
+            'Address': place.get('vicinity', ''),
+            'Rating': place.get('rating', 'N/A'),
+            'User Ratings': place.get('user_ratings_total', 0)
+        })
+
+def build_search_plan(polygon, search_types, planner='square', verbose=True):
+    """Plan each search type on its own grid and merge the plans into one ordered schedule.
+    
+    Returns a list of (grid_index, point, searches) where searches holds the (search_index, place_type, radius)
+    entries whose own grid contains point, so a type is only queried where its radius needs it.
+    """
+    # Types that share a radius share a grid, so each radius is planned once
+    grids = {}
     for _, radius in search_types:
-        points = generate_optimized_grid(polygon, radius)
-        all_points.extend(points)
+        if radius not in grids:
+            grids[radius] = list(map(tuple, plan_grid(polygon, radius, planner)))
+    plans = {place_type: set(grids[radius]) for place_type, radius in search_types}
+    
+    # Keep the union in the same order as before so grid indices stay comparable
+    all_points = list(dict.fromkeys(point for _, radius in search_types for point in grids[radius]))
+    
+    schedule = []
+    for grid_index, point in enumerate(all_points):
+        searches = [(search_index, place_type, radius)
+                    for search_index, (place_type, radius) in enumerate(search_types)
+                    if point in plans[place_type]]
+        schedule.append((grid_index, point, searches))
     
-    # Remove duplicates while preserving order
-    all_points = list(dict.fromkeys(map(tuple, all_points)))
+    # Report the calls saved against querying every type at every point of the union
+    union_calls = len(all_points) * len(search_types)
+    planned_calls = sum(len(searches) for _, _, searches in schedule)
+    if verbose:
+        for place_type, radius in search_types:
+            print(f"  {place_type} ({radius}m): {len(plans[place_type])} points")
+        print(f"Per-type plans: {planned_calls} API calls instead of {union_calls} ({union_calls - planned_calls} saved)")
+    return schedule
+
+def coarsen_empty_searches(skipped, factor=2):
+    """Group held-back empty searches into sentinel searches that each cover several cells with one circle.
+    
+    Cells of the same type are bucketed on a lattice factor times their diameter wide; each bucket becomes one
+    search at the bucket centroid whose radius reaches the far edge of every member circle. Sentinel ids
+    name the search index and bucket ('S2:1234:5678'), so a resumed run maps each sentinel to its journal
+    entry even when a grown yield history holds back a different set of cells; the journal replays that
+    entry only if the sentinel's point and radius are unchanged, and refetches it otherwise.
+    Returns a list of (sentinel_id, point, search_index, place_type, radius, members).
+    """
+    groups = defaultdict(list)
+    for grid_index, point, search_index, place_type, radius in skipped:
+        step = factor * 2 * radius / 111320
+        groups[search_index, floor(point[0] / step), floor(point[1] / step)].append(
+            (grid_index, point, search_index, place_type, radius))
+    
+    sentinels = []
+    for (search_index, lat_cell, lon_cell), members in groups.items():
+        lat = sum(point[0] for _, point, _, _, _ in members) / len(members)
+        lon = sum(point[1] for _, point, _, _, _ in members) / len(members)
+        radius = max(haversine_distance(lat, lon, point[0], point[1]) + member_radius
+                     for _, point, _, _, member_radius in members)
+        # Nearby Search caps the radius at 50 km
+        radius = min(int(radius) + 1, 50000)
+        sentinels.append((f"S{search_index}:{lat_cell}:{lon_cell}", (lat, lon), search_index, members[0][3], radius, members))
+    return sentinels
+
+def run_sentinel_searches(api_key, polygon, brick_index, skipped, executor, session, log_file, processed_ids, all_places,
+                          cache=None, journal=None):
+    """Query one coarse sentinel per group of held-back cells; return the cells that turned out not to be empty.
+
+    A sentinel's circle reaches past its member cells into busier neighbours, so a member is only restored
+    when a returned place lies within its own search circle; the rest stay skipped.
+    """
+    sentinels = coarsen_empty_searches(skipped)
+    futures = [submit_search(executor, journal, sentinel_id, search_index, api_key, point, radius, place_type,
+                             sentinel_id, search_index, log_file, session, cache)
+               for sentinel_id, point, search_index, place_type, radius, _ in sentinels]
+    
+    restored = []
+    for (sentinel_id, point, search_index, place_type, radius, members), future in zip(sentinels, futures):
+        try:
+            places = future.result()
+        except PlacesFetchError:
+            # Nothing is known about the area, so its cells are searched after all
+            restored.extend(members)
+            continue
+        if journal is not None:
+            journal.record(sentinel_id, search_index, place_type, point, radius, places)
+        print(f"Sentinel {sentinel_id}: {place_type} at ({point[0]:.6f}, {point[1]:.6f}) r={radius}m "
+              f"over {len(members)} empty cells - Found: {len(places)}")
+        collect_places(places, place_type, brick_index.region, brick_index, processed_ids, all_places)
+        found = [place.get('geometry', {}).get('location', {}) for place in places]
+        found = [(location['lat'], location['lng']) for location in found if 'lat' in location and 'lng' in location]
+        # Only cells with something inside their own circle go back into the plan
+        restored.extend(member for member in members
+                        if any(haversine_distance(member[1][0], member[1][1], lat, lng) <= member[4]
+                               for lat, lng in found))
+    print(f"Sentinels: {len(sentinels)} searches stood in for {len(skipped)} empty cells, {len(restored)} cells restored")
+    return restored, len(sentinels)
+
+def restore_searches(schedule, restored):
+    """Add restored (grid_index, point, search_index, place_type, radius) searches back into a schedule."""
+    extra = defaultdict(list)
+    points = {}
+    for grid_index, point, search_index, place_type, radius in restored:
+        extra[grid_index].append((search_index, place_type, radius))
+        points[grid_index] = point
+    
+    merged = []
+    for grid_index, point, searches in schedule:
+        merged.append((grid_index, point, sorted(searches + extra.pop(grid_index, []))))
+    for grid_index, searches in extra.items():
+        merged.append((grid_index, points[grid_index], sorted(searches)))
+    return merged
+
+def run_lattice_searches(api_key, polygon, brick_index, search_types, executor, session, log_file, processed_ids, all_places,
+                         cache=None, planner='square', journal=None, history=None, skip_empty_after=None,
+                         empty_policy='skip', budget=None, density=None, coverage_map='background', schedule=None):
+    """Run each search type at the lattice points of its own plan and return (api_calls, grid_hits).
+    
+    With a YieldHistory the plan is ordered by expected yield, and searches empty in each of the last
+    skip_empty_after runs are skipped, or with empty_policy='coarsen' checked by a few larger sentinel searches.
+    With a budget only that many searches are kept, chosen by plan_within_budget from the known
+    business locations in density.
+    coverage_map is 'background' (draw coverage_map.png while fetching), 'inline' or 'off'.
+    schedule is a prebuilt build_search_plan schedule (see cached_search_plan); by default it is planned here.
+    """
+    # Generate optimized search points, one plan per search type
+    with stages.stage('planning'):
+        if schedule is None:
+            schedule = build_search_plan(polygon, search_types, planner)
+        if budget is not None:
+            from budget_planner import load_density, plan_within_budget
+            schedule, _ = plan_within_budget(schedule, budget, density if density is not None else load_density([]),
+                                             cap=MAX_RESULTS_PER_QUERY)
+    all_points = [point for _, point, _ in schedule]
     print(f"Generated {len(all_points)} optimized search points.")
     
-    # Visualize coverage
-    visualize_coverage(polygon, all_points, min(radius for _, radius in search_types))
-    print("Coverage map generated as 'coverage_map.png'")
+    # Visualize coverage, by default on a background thread while the searches run
+    map_args = (polygon, all_points, min(radius for _, radius in search_types))
+    map_job = None
+    if coverage_map == 'inline':
+        with stages.stage('visualization'):
+            print_coverage_stats(visualize_coverage(*map_args, metric=(planner == 'hex')))
+        print("Coverage map generated as 'coverage_map.png'")
+    elif coverage_map == 'background':
+        map_job = CoverageMapJob(*map_args, metric=(planner == 'hex'))
     
     # Perform searches
-    all_places = []
-    processed_ids = set()
+    union_calls = len(schedule) * len(search_types)
     api_calls = 0
     grid_hits = 0  # Total API hits per grid
     
-    # Loop over grid points and perform searches for each type
-    for grid_index, point in enumerate(all_points):
+    if history is not None:
+        # Highest expected yield first; cells that keep coming back empty are held back
+        schedule, skipped = history.prioritise(schedule, search_types, skip_empty_after)
+        print(f"Yield history: plan ordered by expected yield, {len(skipped)} searches held back as repeatedly empty")
+        if skipped and empty_policy == 'coarsen':
+            restored, sentinel_calls = run_sentinel_searches(api_key, polygon, brick_index, skipped, executor, session,
+                                                             log_file, processed_ids, all_places, cache, journal)
+            api_calls += sentinel_calls
+            grid_hits += sentinel_calls
+            schedule = restore_searches(schedule, restored)
+    
+    # Queue every (grid point, search type) unit up front so the pool stays busy
+    futures = {}
+    for grid_index, point, searches in schedule:
+        for search_index, place_type, radius in searches:
+            futures[grid_index, search_index] = submit_search(
+                executor, journal, grid_index, search_index,
+                api_key, point, radius, place_type, grid_index, search_index, log_file, session, cache
+            )
+    
+    # Consume results in plan order so dedup, console output and the per-grid totals match a serial run.
+    # The per-search api_calls.log lines are written by the workers as searches complete, so they can
+    # come out of order and between other grids' totals; YieldHistory matches them line by line.
+    for grid_index, point, searches in schedule:
         # Initialize API call counters per search
         search_hits = {place_type: 0 for place_type, _ in search_types}
         
-        for search_index, (place_type, radius) in enumerate(search_types):
+        for search_index, place_type, radius in searches:
             try:
                 api_calls += 1
                 # Convert point coordinates to string for logging
@@ -219,66 +798,241 @@ def scrape_medical_businesses(api_key, shapefile_path, output_file, log_file='ap
                 print(f"API Call #{api_calls}: {place_type} at {point_str}")
                 
                 grid_hits += 1
-                # Call fetch_places with grid and search indices
-                places = fetch_places(api_key, point, radius, place_type, grid_index, search_index, log_file)
+                places = futures.pop((grid_index, search_index)).result()
+                if journal is not None:
+                    journal.record(grid_index, search_index, place_type, point, radius, places)
+                
+                collect_places(places, place_type, brick_index.region, brick_index, processed_ids, all_places)
                 
-                for place in places:
-                    place_id = place.get("place_id")
-                    if place_id and place_id not in processed_ids:
-                        processed_ids.add(place_id)
-                        
-                        location = place.get("geometry", {}).get("location", {})
-                        lat = location.get("lat")
-                        lng = location.get("lng")
-                        
-                        if lat and lng and polygon.contains(Point(lng, lat)):
-                            # Get brick name
-                            brick_name = "Unknown"
-                            location_point = Point(lng, lat)
-                            for _, row in gdf.iterrows():
-                                if row.geometry.contains(location_point):
-                                    brick_name = row.get('name', 'Unknown')
-                                    break
-                            
-                            all_places.append({
-                                'Place ID': place_id,
-                                'Brick Name': brick_name,
-                                'Business Name': place.get('name'),
-                                'Latitude': lat,
-                                'Longitude': lng,
-                                'Type': place_type,
-                                'Status': place.get('business_status', 'UNKNOWN'),
-                                'Address': place.get('vicinity', ''),
-                                'Rating': place.get('rating', 'N/A'),
-                                'User Ratings': place.get('user_ratings_total', 0)
-                            })
-                            
                 # Log the total number of API hits for each search type (per search)
                 search_hits[place_type] += 1
+            except PlacesFetchError as e:
+                print(f"Search failed at {point}: {e}")
+                if journal is not None:
+                    journal.fail(grid_index, search_index)
+                continue
             except Exception as e:
                 print(f"Error processing point at {point}: {e}")
                 continue
         
         # Log the number of API hits per grid
-        with open(log_file, 'a') as log:
-            log.write(f"\nGrid #{grid_index} - Total API Hits: {grid_hits}\n")
-            for place_type, _ in search_types:
-                log.write(f"  {place_type.capitalize()} Search Hits: {search_hits[place_type]}\n")
+        log = buffered_writer(log_file)
+        log.write(f"\nGrid #{grid_index} - Total API Hits: {grid_hits}\n")
+        for place_type, _ in search_types:
+            log.write(f"  {place_type.capitalize()} Search Hits: {search_hits[place_type]}\n")
+    
+    calls_saved = union_calls - api_calls
+    print(f"\nAPI calls saved against every type at every point: {calls_saved}")
+    buffered_writer(log_file).write(f"\nPer-type plans: {api_calls} API calls, {calls_saved} saved\n")
+    
+    if map_job is not None:
+        stats = map_job.result()
+        if stats is not None:
+            print_coverage_stats(stats)
+            print("Coverage map generated as 'coverage_map.png'")
+    
+    return api_calls, grid_hits
+
+def run_adaptive_searches(api_key, polygon, brick_index, search_types, executor, session, log_file, processed_ids, all_places,
+                          cache=None, planner='square', journal=None):
+    """Run every search type through adaptive_search and return the number of API calls made."""
+    api_calls = 0
+    for search_index, (place_type, radius) in enumerate(search_types):
+        type_calls = splits = pruned = 0
+        for cell_id, point, cell_radius, places, children in adaptive_search(
+                api_key, polygon, place_type, radius, executor, session, search_index, log_file, cache=cache, planner=planner,
+                journal=journal):
+            api_calls += 1
+            type_calls += 1
+            print(f"API Call #{api_calls}: {place_type} at ({point[0]:.6f}, {point[1]:.6f}) r={cell_radius:.0f}m cell {cell_id}")
+            collect_places(places, place_type, brick_index.region, brick_index, processed_ids, all_places)
+            if children:
+                splits += 1
+            elif not places:
+                pruned += 1
+        
+        summary = f"{place_type.capitalize()} adaptive plan: {type_calls} calls, {splits} saturated cells split, {pruned} empty cells pruned"
+        print(summary)
+        buffered_writer(log_file).write(f"\n{summary}\n")
+    return api_calls
+
+def scrape_medical_businesses(api_key, shapefile_path, output_file, log_file='api_calls.log', max_workers=DEFAULT_MAX_WORKERS,
+                              adaptive=False, cache=None, planner='square', resume=False, journal_file=None,
+                              history_file=None, skip_empty_after=None, empty_policy='skip', city=None,
+                              budget=None, density_files=None, coverage_map='background', region_cache=None,
+                              simplify_tolerance=None, edge_buffer=None):
+    """Main function to scrape medical businesses and log API hits per search, grid, and customer count.
+    
+    Searches run concurrently on max_workers threads sharing one pooled keep-alive session.
+    With adaptive=True each search type is planned by adaptive_search instead of the fixed lattice.
+    An optional PlacesCache serves repeated queries from disk. planner selects the square lattice or
+    the hexagonal UTM lattice (see generate_hex_grid).
+    Completed searches are journaled to journal_file (default: next to output_file); resume=True replays
+    them and only fetches what is left. The journal is removed once the output is saved, unless searches
+    failed after their retries; resuming then fetches just those.
+    history_file points at earlier api_calls.log output; the lattice plan is then ordered by past yield and
+    cells empty skip_empty_after runs in a row are skipped or, with empty_policy='coarsen', re-checked coarsely.
+    Results stream to output_file as they arrive: a *.csv path is appended in batches, any other path is
+    written as a Parquet dataset partitioned by city (default: the region file name) and type.
+    budget caps the lattice plan at that many API calls, spent where earlier outputs in density_files
+    (e.g. Karachi.csv) show the most businesses not yet covered by another picked search.
+    coverage_map='background' draws coverage_map.png while fetching; 'inline' draws it first, 'off' skips it.
+    An optional RegionCache keeps the region geometry and lattice plan of regions seen before.
+    simplify_tolerance (metres) plans and filters against a simplified, edge_buffer-grown outline of the
+    region instead of the exact one (see load_region).
+    """
+    stages.reset()
+    events = events_for(log_file)
+    events.reset()
+    
+    # Load and process shapefile
+    with stages.stage('shapefile load'):
+        digest, polygon, brick_index = load_region(shapefile_path, region_cache, simplify_tolerance, edge_buffer)
+    print("Shapefile loaded. Generating optimized search points...")
+    
+    # Define search parameters
+    search_types = SEARCH_TYPES
+    
+    if planner == 'hex':
+        # Report how many points the hexagonal plan saves over today's square grid
+        with stages.stage('planning'):
+            compare_planners(polygon, search_types)
+    
+    # Past yields are read before this run appends to the log
+    history = None
+    if history_file is not None:
+        history = YieldHistory.from_log(history_file)
+        print(f"Loaded yield history for {len(history)} cells from {history_file}")
+    
+    density = None
+    if budget is not None:
+        from budget_planner import load_density
+        density = load_density(density_files or [])
+        print(f"Loaded {len(density)} known business locations for budget planning")
+    
+    # Stream records to disk in batches instead of holding the whole region in memory
+    if city is None:
+        city = os.path.splitext(os.path.basename(shapefile_path))[0]
+    all_places = open_sink(output_file, city=city)
+    processed_ids = set()
+    
+    # Journal every completed search so an interrupted run can resume where it stopped
+    if journal_file is None:
+        journal_file = os.path.splitext(output_file)[0] + '.journal.jsonl'
+    settings = {
+        'shapefile': os.path.abspath(shapefile_path),
+        'planner': planner,
+        'adaptive': adaptive,
+        'search_types': [list(search_type) for search_type in search_types],
+        'history_file': history_file,
+        'skip_empty_after': skip_empty_after,
+        'empty_policy': empty_policy,
+        'budget': budget,
+        'density_files': density_files,
+        'simplify_tolerance': simplify_tolerance,
+        'edge_buffer': edge_buffer,
+    }
+    journal = ScrapeJournal(journal_file, settings, resume=resume)
+    resumed = len(journal.completed)
+    
+    # Start at half the pool and let healthy answers ramp concurrency up to max_workers
+    global rate_controller
+    rate_controller = AIMDController(initial=max(1, max_workers // 2), maximum=max_workers)
+    
+    schedule = None
+    if region_cache is not None and not adaptive:
+        with stages.stage('planning'):
+            schedule = cached_search_plan(polygon, search_types, planner, region_cache, digest)
+    
+    with create_session(max_workers) as session, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            # Planning, validation and visualization inside the runners are timed as their own stages
+            with stages.stage('fetching'):
+                if adaptive:
+                    api_calls = run_adaptive_searches(api_key, polygon, brick_index, search_types, executor, session,
+                                                      log_file, processed_ids, all_places, cache, planner, journal)
+                    grid_hits = api_calls
+                else:
+                    api_calls, grid_hits = run_lattice_searches(api_key, polygon, brick_index, search_types, executor,
+                                                                session, log_file, processed_ids, all_places, cache,
+                                                                planner, journal, history, skip_empty_after,
+                                                                empty_policy, budget, density, coverage_map, schedule)
+        except BaseException:
+            # On Ctrl-C or a crash, drop queued searches instead of paying for them; the journal keeps the rest
+            executor.shutdown(wait=False, cancel_futures=True)
+            journal.close()
+            all_places.close()
+            flush_all()
+            print(f"\nScrape interrupted; rerun with resume=True to continue from {journal_file}")
+            raise
     
     # Final log after all searches
     print(f"\nTotal API calls made: {grid_hits}")
     print(f"\nTotal API calls made: {api_calls}")
     print(f"Total unique places found: {len(all_places)}")
+    if resumed:
+        print(f"Searches replayed from journal: {resumed}")
+    if cache is not None:
+        stats = cache.stats()
+        print(f"Cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate), "
+              f"{stats['entries']} entries, {stats['evictions']} evicted")
     
-    # Save results
-    df = pd.DataFrame(all_places)
-    df.to_csv(output_file, index=False, encoding='utf-8')
+    # Flush the last batch of results
+    with stages.stage('writing'):
+        all_places.close()
     print(f"Data saved to {output_file}")
+    controller = rate_controller.stats()
+    print(f"Concurrency: peak {controller['peak']:.0f} of {max_workers}, {controller['backoffs']} backoffs")
+    if journal.failed:
+        # Keep the journal so a resumed run fetches only the failed searches
+        journal.close()
+        print(f"{len(journal.failed)} searches failed after retries; rerun with resume=True to fetch them "
+              f"from {journal_file}")
+    else:
+        journal.close(remove=True)
+    
+    # Request metrics and per-stage timings
+    summary = events.summary(stages.totals.get('fetching'))
+    print(f"Latency p50 {summary['p50_latency_ms']} ms, p95 {summary['p95_latency_ms']} ms; "
+          f"{summary['calls_per_sec']} calls/sec; {summary['results_per_call']} results per call; "
+          f"{summary['saturation_rate']:.1%} saturated")
+    print("Stage timings: " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in stages.totals.items()))
+    events.record('run_summary', output_file=output_file, places=len(all_places),
+                  stages={name: round(seconds, 3) for name, seconds in stages.totals.items()}, **summary)
+    flush_all()
 
 # Usage
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape medical businesses inside a region shapefile.")
+    parser.add_argument("shapefile_path", nargs="?", default="lahoreShp/Nahla/Nahla.shp")
+    parser.add_argument("output_file", nargs="?", default="Nahla.csv", help="*.csv, or a directory for Parquet output")
+    parser.add_argument("--city", help="city partition for Parquet output (default: region file name)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS, help="concurrent API requests")
+    parser.add_argument("--planner", choices=["square", "hex"], default="square")
+    parser.add_argument("--adaptive", action="store_true", help="refine the grid where results saturate")
+    parser.add_argument("--resume", action="store_true", help="continue an interrupted scrape from its journal")
+    parser.add_argument("--history", help="api_calls.log from earlier runs, used to order the plan by yield")
+    parser.add_argument("--skip-empty-after", type=int, help="skip cells empty in this many previous runs in a row")
+    parser.add_argument("--coarsen-empty", action="store_true", help="re-check skipped cells with coarse sentinel searches")
+    parser.add_argument("--budget", type=int, help="max API calls; spent where --density shows the most businesses")
+    parser.add_argument("--density", nargs="+", help="earlier outputs (e.g. Karachi.csv Lahore.csv) for --budget")
+    parser.add_argument("--simplify", type=float, metavar="METRES",
+                        help="plan against the region outline simplified to this tolerance")
+    parser.add_argument("--edge-buffer", type=float, metavar="METRES",
+                        help="grow the simplified outline by this much (default: the tolerance)")
+    parser.add_argument("--coverage-map", choices=["background", "inline", "off"], default="background",
+                        help="when to draw coverage_map.png")
+    args = parser.parse_args()
+    
     api_key = os.getenv("GOOGLE_PLACES_API_KEY")
-    shapefile_path = "lahoreShp/Nahla/Nahla.shp"
-    output_file = "Nahla.csv"
     
-    scrape_medical_businesses(api_key, shapefile_path, output_file)
\ No newline at end of file
+    # Set PLACES_REPLAY_ONLY=1 to rerun offline from the response cache
+    cache = cache_from_env()
+    # Set REGION_CACHE_DISABLED=1 to always re-read the region file
+    region_cache = region_cache_from_env()
+    scrape_medical_businesses(api_key, args.shapefile_path, args.output_file, max_workers=args.workers, cache=cache,
+                              adaptive=args.adaptive, planner=args.planner, resume=args.resume,
+                              history_file=args.history, skip_empty_after=args.skip_empty_after,
+                              empty_policy='coarsen' if args.coarsen_empty else 'skip', city=args.city,
+                              budget=args.budget, density_files=args.density, coverage_map=args.coverage_map,
+                              region_cache=region_cache, simplify_tolerance=args.simplify, edge_buffer=args.edge_buffer)
\ No newline at end of file
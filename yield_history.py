@@ -0,0 +1,88 @@
+import os
+import re
+from collections import defaultdict
+
+# Matches the per-search lines fetch_places writes to api_calls.log. Cache hits are replays of an
+# earlier observation, so only real API hits count as history.
+LOG_LINE = re.compile(
+    r"^Grid #(?P<grid>\S+) \| Search #(?P<search>\S+) \| API Hit: (?P<type>\w+) "
+    r"at \((?P<lat>-?[\d.]+), (?P<lon>-?[\d.]+)\) - Found: (?P<found>\d+) customers"
+)
+
+def cell_key(place_type, point):
+    """History key for a search: type plus the point at the 6-decimal precision used in the log."""
+    lat, lon = point
+    return place_type, f"{lat:.6f}", f"{lon:.6f}"
+
+class YieldHistory:
+    """Per-cell, per-type result counts from earlier runs, oldest first."""
+
+    def __init__(self):
+        self.observations = defaultdict(list)
+
+    @classmethod
+    def from_log(cls, log_file):
+        """Build the history from one or more api_calls.log files; missing files are ignored."""
+        history = cls()
+        log_files = [log_file] if isinstance(log_file, str) else log_file
+        for path in log_files:
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding='utf-8', errors='replace') as f:
+                for line in f:
+                    match = LOG_LINE.match(line)
+                    if match:
+                        history.observe(match['type'], (float(match['lat']), float(match['lon'])), int(match['found']))
+        return history
+
+    def observe(self, place_type, point, found):
+        self.observations[cell_key(place_type, point)].append(found)
+
+    def __len__(self):
+        return len(self.observations)
+
+    def type_mean(self, place_type):
+        """Mean yield of every observed cell of place_type, used as the prior for unseen cells."""
+        totals = [sum(values) / len(values) for (t, _, _), values in self.observations.items() if t == place_type]
+        return sum(totals) / len(totals) if totals else 0.0
+
+    def expected_yield(self, place_type, point, prior=None):
+        values = self.observations.get(cell_key(place_type, point))
+        if not values:
+            return self.type_mean(place_type) if prior is None else prior
+        return sum(values) / len(values)
+
+    def empty_streak(self, place_type, point):
+        """Number of most recent runs in a row in which this cell returned nothing."""
+        streak = 0
+        for found in reversed(self.observations.get(cell_key(place_type, point), [])):
+            if found:
+                break
+            streak += 1
+        return streak
+
+    def prioritise(self, schedule, search_types, skip_empty_after=None):
+        """Reorder a build_search_plan schedule by expected yield and drop searches that keep coming back empty.
+
+        Grid points are sorted by the summed expected yield of their searches, highest first; unseen
+        cells use the mean of their type so they are neither starved nor favoured. Searches whose cell
+        was empty in each of the last skip_empty_after runs are removed.
+        Returns (schedule, skipped) where skipped lists (grid_index, point, search_index, place_type, radius).
+        """
+        priors = {place_type: self.type_mean(place_type) for place_type, _ in search_types}
+        prioritised = []
+        skipped = []
+        for grid_index, point, searches in schedule:
+            kept = []
+            for search_index, place_type, radius in searches:
+                if skip_empty_after and self.empty_streak(place_type, point) >= skip_empty_after:
+                    skipped.append((grid_index, point, search_index, place_type, radius))
+                else:
+                    kept.append((search_index, place_type, radius))
+            if kept:
+                expected = sum(self.expected_yield(place_type, point, priors[place_type]) for _, place_type, _ in kept)
+                prioritised.append((expected, grid_index, point, kept))
+
+        # Stable sort keeps plan order among equal expectations
+        prioritised.sort(key=lambda entry: -entry[0])
+        return [(grid_index, point, kept) for _, grid_index, point, kept in prioritised], skipped